@@ -4,6 +4,7 @@ from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config
 from sqlalchemy import pool
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncEngine
 
 from alembic import context
@@ -21,7 +22,7 @@ database_url = os.getenv('DATABASE_URL')
 if database_url is None:
     raise ValueError("DATABASE_URL environment variable is not set")
 
-print(f"--->{database_url}")
+print(f"--->{make_url(database_url).render_as_string(hide_password=True)}")
 config.set_main_option('sqlalchemy.url', database_url)
 
 # Interpret the config file for Python logging.
@@ -32,8 +33,12 @@ fileConfig(config.config_file_name)
 # for 'autogenerate' support
 from app.db.base import Base
 from app.models.email_verification_token import EmailVerificationToken
+from app.models.maintenance_lease import MaintenanceLease
 from app.models.mfa import MFA
+from app.models.outbox_message import OutboxMessage
 from app.models.password_reset_token import PasswordResetToken
+from app.models.revoked_subject import RevokedSubject
+from app.models.revoked_token import RevokedToken
 from app.models.user_session import UserSession
 from app.models.user import User
 
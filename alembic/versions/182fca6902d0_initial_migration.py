@@ -9,7 +9,6 @@ from typing import Sequence, Union
 
 from alembic import op
 import sqlalchemy as sa
-from app.models.custom_types import ULIDType
 
 # revision identifiers, used by Alembic.
 revision: str = '182fca6902d0'
@@ -21,7 +20,7 @@ depends_on: Union[str, Sequence[str], None] = None
 def upgrade() -> None:
     # ### commands auto generated by Alembic - please adjust! ###
     op.create_table('users',
-    sa.Column('id', ULIDType(), nullable=False),
+    sa.Column('id', sa.CHAR(length=26), nullable=False),
     sa.Column('username', sa.String(), nullable=False),
     sa.Column('email', sa.String(), nullable=False),
     sa.Column('hashed_password', sa.String(), nullable=False),
@@ -37,7 +36,7 @@ def upgrade() -> None:
     op.create_index(op.f('ix_users_username'), 'users', ['username'], unique=True)
     op.create_table('email_verification_tokens',
     sa.Column('id', sa.Integer(), nullable=False),
-    sa.Column('user_id', ULIDType(), nullable=False),
+    sa.Column('user_id', sa.CHAR(length=26), nullable=False),
     sa.Column('token', sa.String(), nullable=False),
     sa.Column('expires_at', sa.DateTime(), nullable=False),
     sa.Column('created_at', sa.DateTime(), nullable=True),
@@ -48,7 +47,7 @@ def upgrade() -> None:
     op.create_index(op.f('ix_email_verification_tokens_id'), 'email_verification_tokens', ['id'], unique=False)
     op.create_table('mfa',
     sa.Column('id', sa.Integer(), nullable=False),
-    sa.Column('user_id', ULIDType(), nullable=False),
+    sa.Column('user_id', sa.CHAR(length=26), nullable=False),
     sa.Column('mfa_type', sa.String(), nullable=False),
     sa.Column('secret', sa.String(), nullable=True),
     sa.Column('enabled', sa.Boolean(), nullable=True),
@@ -60,7 +59,7 @@ def upgrade() -> None:
     op.create_index(op.f('ix_mfa_id'), 'mfa', ['id'], unique=False)
     op.create_table('password_reset_tokens',
     sa.Column('id', sa.Integer(), nullable=False),
-    sa.Column('user_id', ULIDType(), nullable=False),
+    sa.Column('user_id', sa.CHAR(length=26), nullable=False),
     sa.Column('token', sa.String(), nullable=False),
     sa.Column('expires_at', sa.DateTime(), nullable=False),
     sa.Column('created_at', sa.DateTime(), nullable=True),
@@ -71,7 +70,7 @@ def upgrade() -> None:
     op.create_index(op.f('ix_password_reset_tokens_id'), 'password_reset_tokens', ['id'], unique=False)
     op.create_table('user_sessions',
     sa.Column('id', sa.Integer(), nullable=False),
-    sa.Column('user_id', ULIDType(), nullable=False),
+    sa.Column('user_id', sa.CHAR(length=26), nullable=False),
     sa.Column('refresh_token', sa.String(), nullable=False),
     sa.Column('ip_address', sa.String(length=45), nullable=True),
     sa.Column('device_type', sa.String(), nullable=True),
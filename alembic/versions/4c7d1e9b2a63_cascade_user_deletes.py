@@ -0,0 +1,41 @@
+"""Cascade user deletes to their sessions, tokens and MFA rows
+
+Revision ID: 4c7d1e9b2a63
+Revises: 9e4b6d2f1a87
+Create Date: 2026-10-18 21:02:44.118306
+
+"""
+from typing import Optional, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c7d1e9b2a63'
+down_revision: Union[str, None] = '9e4b6d2f1a87'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CHILD_TABLES = ['user_sessions', 'password_reset_tokens', 'email_verification_tokens', 'mfa']
+
+
+def upgrade() -> None:
+    _set_user_id_ondelete('CASCADE')
+
+
+def downgrade() -> None:
+    _set_user_id_ondelete(None)
+
+
+def _set_user_id_ondelete(ondelete: Optional[str]):
+    if op.get_bind().dialect.name == 'postgresql':
+        for table in CHILD_TABLES:
+            op.drop_constraint(f'{table}_user_id_fkey', table, type_='foreignkey')
+            op.create_foreign_key(f'{table}_user_id_fkey', table, 'users', ['user_id'], ['id'], ondelete=ondelete)
+        return
+    # SQLite's foreign keys are unnamed: the table is rebuilt with user_id given as already reflected
+    for table in CHILD_TABLES:
+        reflected = sa.Column('user_id', sa.BINARY(length=16), sa.ForeignKey('users.id', ondelete=ondelete), nullable=False)
+        with op.batch_alter_table(table, recreate='always', reflect_args=[reflected]):
+            pass
@@ -0,0 +1,26 @@
+"""Add password version to users
+
+Revision ID: 6a1f8c3d7e25
+Revises: 4c7d1e9b2a63
+Create Date: 2026-10-18 20:12:37.504211
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6a1f8c3d7e25'
+down_revision: Union[str, None] = '4c7d1e9b2a63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('password_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'password_version')
@@ -0,0 +1,98 @@
+"""Store ULIDs in 16 bytes
+
+Revision ID: 9e4b6d2f1a87
+Revises: 7f3a9d2c6b58
+Create Date: 2026-10-18 19:41:07.520913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import ulid
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e4b6d2f1a87'
+down_revision: Union[str, None] = '7f3a9d2c6b58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CHILD_TABLES = ['user_sessions', 'password_reset_tokens', 'email_verification_tokens', 'mfa']
+COLUMNS = [('users', 'id')] + [(table, 'user_id') for table in CHILD_TABLES]
+
+# Crockford base32 <-> 128 bits. The 26 characters carry 130 bits, the first two are always zero.
+POSTGRESQL_FUNCTIONS = """
+CREATE FUNCTION pg_temp.ulid_to_uuid(value text) RETURNS uuid AS $$
+DECLARE
+    alphabet CONSTANT text := '0123456789ABCDEFGHJKMNPQRSTVWXYZ';
+    bits bit varying := B'';
+BEGIN
+    FOR i IN 1..26 LOOP
+        bits := bits || (strpos(alphabet, upper(substr(value, i, 1))) - 1)::bit(5);
+    END LOOP;
+    RETURN (
+        lpad(to_hex(substring(bits FROM 3 FOR 32)::bit(32)::int), 8, '0')
+        || lpad(to_hex(substring(bits FROM 35 FOR 32)::bit(32)::int), 8, '0')
+        || lpad(to_hex(substring(bits FROM 67 FOR 32)::bit(32)::int), 8, '0')
+        || lpad(to_hex(substring(bits FROM 99 FOR 32)::bit(32)::int), 8, '0')
+    )::uuid;
+END
+$$ LANGUAGE plpgsql IMMUTABLE STRICT;
+
+CREATE FUNCTION pg_temp.uuid_to_ulid(value uuid) RETURNS text AS $$
+DECLARE
+    alphabet CONSTANT text := '0123456789ABCDEFGHJKMNPQRSTVWXYZ';
+    bits bit(130) := B'00' || ('x' || replace(value::text, '-', ''))::bit(128);
+    result text := '';
+BEGIN
+    FOR i IN 0..25 LOOP
+        result := result || substr(alphabet, substring(bits FROM i * 5 + 1 FOR 5)::bit(5)::int + 1, 1);
+    END LOOP;
+    RETURN result;
+END
+$$ LANGUAGE plpgsql IMMUTABLE STRICT;
+"""
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        _alter_postgresql(postgresql.UUID(), sa.CHAR(length=26), 'pg_temp.ulid_to_uuid({})')
+    else:
+        _alter_in_python(sa.BINARY(length=16), lambda value: ulid.from_str(value).bytes)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        _alter_postgresql(sa.CHAR(length=26), postgresql.UUID(), 'pg_temp.uuid_to_ulid({})')
+    else:
+        _alter_in_python(sa.CHAR(length=26), lambda value: str(ulid.from_bytes(value)))
+
+
+def _alter_postgresql(type_, existing_type, using):
+    # The foreign keys must go while users.id and the user_id columns have different types
+    op.execute(POSTGRESQL_FUNCTIONS)
+    for table in CHILD_TABLES:
+        op.drop_constraint(f'{table}_user_id_fkey', table, type_='foreignkey')
+    for table, column in COLUMNS:
+        op.alter_column(table, column, type_=type_, existing_type=existing_type, existing_nullable=False, postgresql_using=using.format(column))
+    for table in CHILD_TABLES:
+        op.create_foreign_key(f'{table}_user_id_fkey', table, 'users', ['user_id'], ['id'])
+
+
+def _alter_in_python(type_, convert):
+    # SQLite cannot alter a column type: the values are rewritten first, then the table is rebuilt
+    # with the new type given as already reflected, so the copy does not CAST (and mangle) them
+    bind = op.get_bind()
+    for table, column in COLUMNS:
+        values = bind.execute(sa.text(f'SELECT DISTINCT {column} FROM {table}')).scalars().all()
+        stmt = sa.text(f'UPDATE {table} SET {column} = :new WHERE {column} = :old')
+        for value in values:
+            bind.execute(stmt, {'new': convert(value), 'old': value})
+        if column == 'id':
+            reflected = sa.Column(column, type_, primary_key=True, nullable=False)
+        else:
+            reflected = sa.Column(column, type_, sa.ForeignKey('users.id'), nullable=False)
+        with op.batch_alter_table(table, recreate='always', reflect_args=[reflected]):
+            pass
@@ -1,4 +1,5 @@
-import jwt
+import logging
+import uuid
 
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, Request, status
@@ -6,26 +7,35 @@ from fastapi_jwt_auth import AuthJWT
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
-from app.core.config import settings
+from app.crud.email_verification_token import crud_email_verification_token
 from app.crud.password_reset_token import crud_password_reset_token
 from app.crud.user import crud_user
 from app.crud.user_session import crud_session
 from app.db.session import get_db
-from app.core.token_handler import verify_active_refresh_token, get_verify_access_token_dependency, invalidate_access_token
+from app.core.metrics import PHASE_JWT, timed_phase
+from app.core.rate_limit import rate_limiter
+from app.core.token_handler import (
+    verify_active_refresh_token,
+    get_verify_access_token_dependency,
+    invalidate_access_token,
+    invalidate_all_tokens,
+)
 from app.models.custom_types import ULIDType
-from app.schemas.user import User, UserLogin, UserCreate
+from app.schemas.user import EmailVerificationConfirm, User, UserLogin, UserCreate
 from app.schemas.user_session import SessionCreate
 from app.schemas.password import PasswordChange, PasswordResetRequest, PasswordResetConfirm
-from app.core.security import verify_password
+from app.core.security import verify_password_async
 
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 
 @router.post("/register", response_model=User)
 async def create_user(
-    user_in: UserCreate, db: AsyncSession = Depends(get_db)
+    user_in: UserCreate, request: Request, db: AsyncSession = Depends(get_db)
 ):
+    await rate_limiter.hit("register:ip", request.client.host)
     user = await crud_user.get_user_by_username_or_email(
         db, username=user_in.username, email=user_in.email
     )
@@ -40,6 +50,30 @@ async def create_user(
     return user
 
 
+@router.post("/verify-email")
+async def verify_email(data: EmailVerificationConfirm, db: AsyncSession = Depends(get_db)):
+    token = await crud_email_verification_token.get_token_by_token(db, token=data.token)
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Invalid verification token"
+        )
+    elif token.used:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been used already"
+        )
+    elif token.expires_at < datetime.now():
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has expired"
+        )
+
+    await crud_email_verification_token.verify(db, token)
+
+    return {"msg": "Email verified"}
+
+
 @router.post("/login")
 async def login_for_access_token(
     db: AsyncSession = Depends(get_db),
@@ -47,10 +81,15 @@ async def login_for_access_token(
     Authorize: AuthJWT = Depends(),
     request: Request = None,
 ):
-    user = await crud_user.authenticate(
-        db, username=form_data.username, password=form_data.password
+    await rate_limiter.hit("login:ip", request.client.host)
+    user = await crud_user.get_user_by_username_or_email(
+        db, username=form_data.username, email=form_data.username
     )
+    # One bucket per account whether it is named by username or email, checked before paying for the hash
+    await rate_limiter.hit("login:username", str(user.id) if user else form_data.username)
+    user = await crud_user.check_password(user, form_data.password)
     if not user:
+        logger.info("Login failed", extra={"username": form_data.username})
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -67,23 +106,24 @@ async def login_for_access_token(
             detail="User is not verified",
         )
 
-    access_token = Authorize.create_access_token(subject=user.username)
-    refresh_token = Authorize.create_refresh_token(subject=user.username)
-    decoded_token = jwt.decode(refresh_token, settings.SECRET_KEY)
+    # Mint the refresh jti ourselves so the session row can be written without decoding the token again
+    refresh_jti = str(uuid.uuid4())
+    with timed_phase(PHASE_JWT):
+        access_token = Authorize.create_access_token(subject=user.username)
+        refresh_token = Authorize.create_refresh_token(subject=user.username, user_claims={"jti": refresh_jti})
 
     Authorize.set_access_cookies(access_token)
     Authorize.set_refresh_cookies(refresh_token)
 
-    print(f"decoded jti: {decoded_token['jti']}")
-
     session_data = SessionCreate(
-        user_id=str(user.id),
-        refresh_token=decoded_token['jti'],
+        user_id=user.id,
+        refresh_token=refresh_jti,
         ip_address=request.client.host,
         user_agent=request.headers.get("user-agent"),
     )
 
     _ = await crud_session.create_session(db, session_data)
+    logger.info("Login succeeded", extra={"username": user.username})
 
     return {"access_token": access_token, "refresh_token": refresh_token}
 
@@ -96,15 +136,16 @@ async def refresh_access_token(
     db: AsyncSession = Depends(get_db),
 ):
     username = refresh_token['sub']
-    user = await crud_user.get_user_by_username(db, username)
-    if not user:
+    identity = await crud_user.get_identity_by_username(db, username)
+    if not identity:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid refresh token",
         )
 
     await invalidate_access_token(access_token)
-    access_token = Authorize.create_access_token(subject=user.username)
+    with timed_phase(PHASE_JWT):
+        access_token = Authorize.create_access_token(subject=identity.username)
     Authorize.set_access_cookies(access_token)
 
     return {"access_token": access_token}
@@ -132,6 +173,7 @@ async def logout_all(
     db: AsyncSession = Depends(get_db),
 ):
     await crud_session.deactivate_all_sessions(db=db, username=refresh_token['sub'])
+    await invalidate_all_tokens(refresh_token['sub'])
     await invalidate_access_token(access_token)
     Authorize.unset_jwt_cookies()
 
@@ -139,17 +181,17 @@ async def logout_all(
 
 
 @router.post("/password-reset/request")
-async def password_reset_request(data: PasswordResetRequest, db: AsyncSession = Depends(get_db)):
+async def password_reset_request(data: PasswordResetRequest, request: Request, db: AsyncSession = Depends(get_db)):
+    await rate_limiter.hit("password_reset:ip", request.client.host)
+    await rate_limiter.hit("password_reset:email", data.email)
     user = await crud_user.get_user_by_email(db, email=data.email)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User with this email not found"
         )
-    token = await crud_user.create_password_reset_token(db, str(user.id))
-    # TODO: Send email
-    # await send_password_reset_email(user.email, token)
-    print(f"email: {user.email}, token: {token.token}")
+    await crud_user.create_password_reset_token(db, user.id, email=user.email)
+    logger.info("Password reset email queued", extra={"email": user.email})
     return {"msg": "Password reset email sent"}
 
 
@@ -172,11 +214,12 @@ async def password_reset_confirm(data: PasswordResetConfirm, db: AsyncSession =
             detail="Token has expired"
         )
     
-    user = await crud_user.update_password(db, user_id=str(token.user_id), password=data.new_password)
+    user = await crud_user.update_password(db, user_id=token.user_id, password=data.new_password)
     await crud_password_reset_token.invalidate_token(db, token)
 
     if data.should_logout:
         await crud_session.deactivate_all_sessions(db, user.username)
+        await invalidate_all_tokens(user.username)
 
     return {"msg": "Password reset successful"}
 
@@ -184,22 +227,38 @@ async def password_reset_confirm(data: PasswordResetConfirm, db: AsyncSession =
 @router.post("/password-change")
 async def password_change(
     data: PasswordChange,
-    access_token: Optional[dict] = Depends(get_verify_access_token_dependency(required=False)),
+    access_token: dict = Depends(get_verify_access_token_dependency()),
     Authorize: AuthJWT = Depends(),
     db: AsyncSession = Depends(get_db),
 ):
 
     username= access_token['sub']
-    user = await crud_user.get_user_by_username(db, username)
-    if not verify_password(data.old_password, user.hashed_password):
+    identity = await crud_user.get_identity_by_username(db, username)
+    if not identity:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid access token",
+        )
+    changed_meanwhile = HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Password was changed in the meantime, try again",
+    )
+    hashed_password = await crud_user.get_password_hash(db, identity)
+    if not hashed_password:
+        raise changed_meanwhile
+    if not await verify_password_async(data.old_password, hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect old password"
         )
-    
-    user = await crud_user.update_password(db, str(user.id), data.new_password)
+
+    # Only replaces the password that was verified, not one changed in the meantime
+    user = await crud_user.update_password(db, identity.id, data.new_password, identity.password_version)
+    if not user:
+        raise changed_meanwhile
     if data.should_logout:
         await crud_session.deactivate_all_sessions(db, user.username)
+        await invalidate_all_tokens(user.username)
         await invalidate_access_token(access_token)
         Authorize.unset_jwt_cookies()
 
@@ -1,4 +1,9 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.core.lifecycle import lifecycle
+from app.core.security import password_hashing_pool
+from app.db.session import pool_metrics
 
 router = APIRouter()
 
@@ -6,3 +11,26 @@ router = APIRouter()
 @router.get("/health", tags=["health"])
 async def health_check():
     return {"status": "ok"}
+
+
+@router.get("/health/ready", tags=["health"])
+async def readiness_check():
+    # For load balancers: only route here once the warm-up has finished
+    if not lifecycle.ready:
+        return JSONResponse(status_code=503, content={"status": "warming up"})
+    return {"status": "ready"}
+
+
+@router.get("/health/lifecycle", tags=["health"])
+async def lifecycle_metrics():
+    return lifecycle.metrics()
+
+
+@router.get("/health/hashing", tags=["health"])
+async def hashing_pool_metrics():
+    return password_hashing_pool.metrics()
+
+
+@router.get("/health/db", tags=["health"])
+async def db_pool_metrics():
+    return pool_metrics()
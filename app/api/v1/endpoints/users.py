@@ -1,10 +1,97 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import json
+
+import ulid
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.token_handler import get_verify_access_token_dependency, invalidate_all_tokens
+from app.core.user_import import FORMATS, ImportProgress, UserImporter, read_lines
 from app.crud.user import crud_user
+from app.crud.user_session import crud_session
 from app.db.session import get_db
 from app.schemas import user as user_schema
 
 router = APIRouter()
 
 
+class RequestStreamingResponse(StreamingResponse):
+    """A StreamingResponse that can be sent while the request body is still being read.
+
+    StreamingResponse watches for disconnects by reading the request, which
+    would swallow the body; here the body reader notices them instead.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+async def require_superuser(
+    access_token: dict = Depends(get_verify_access_token_dependency()),
+    db: AsyncSession = Depends(get_db),
+):
+    user = await crud_user.get_user_by_username(db, access_token["sub"])
+    if not user or not user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
+    return user
+
+
+@router.get("/me", response_model=user_schema.User)
+async def read_own_profile(
+    access_token: dict = Depends(get_verify_access_token_dependency()),
+    db: AsyncSession = Depends(get_db),
+):
+    # The identity decides access and comes from the primary, the profile itself may come from a replica
+    identity = await crud_user.get_identity_by_username(db, access_token["sub"])
+    user = await crud_user.get_user(db, identity.id) if identity and identity.is_active else None
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found",
+        )
+    return user
+
+
+@router.patch("/{user_id}/active", response_model=user_schema.UserDetailed, dependencies=[Depends(require_superuser)])
+async def set_user_active(user_id: str, data: user_schema.UserActiveUpdate, db: AsyncSession = Depends(get_db)):
+    try:
+        user = await crud_user.set_active(db, ulid.from_str(user_id), data.is_active)
+    except ValueError:
+        user = None
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found",
+        )
+    if not user.is_active:
+        # Refreshing is refused from now on; this also ends the sessions and access tokens already out
+        await crud_session.deactivate_all_sessions(db, user.username)
+        await invalidate_all_tokens(user.username)
+    return user
+
+
+@router.post("/import", dependencies=[Depends(require_superuser)])
+async def import_users(request: Request, format: str = "ndjson", start_at: int = 0):
+    """Streams the body in as NDJSON or CSV records and the progress out as NDJSON, one line per chunk.
+
+    When the import stops early, send the same body again with start_at set to the last checkpoint.
+    """
+    if format not in FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"format must be one of {', '.join(FORMATS)}",
+        )
+    importer = UserImporter(format)
+
+    async def report():
+        progress = ImportProgress(start_at)
+        async for progress in importer.run(read_lines(request.stream()), start_at):
+            yield json.dumps(progress.as_dict()) + "\n"
+        yield json.dumps({**progress.as_dict(), "done": True, "errors": progress.errors}) + "\n"
+
+    return RequestStreamingResponse(report(), media_type="application/x-ndjson")
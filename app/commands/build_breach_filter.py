@@ -0,0 +1,54 @@
+"""Build the breached password filter read by PASSWORD_BREACH_FILTER_PATH.
+
+    python -m app.commands.build_breach_filter pwned-passwords-sha1.txt breached.bloom [--false-positive-rate 0.001]
+
+The input has one entry per line, either a plaintext password or a SHA-1 hex
+digest optionally followed by ":count" (the Have I Been Pwned download
+format). The input is read twice, once to count it, so it can be a file of any
+size; the filter itself takes about 1.8 bytes per entry at the default rate.
+"""
+import argparse
+import time
+from typing import Iterator, List, Optional
+
+from app.core.breach_filter import password_digest, write_breach_filter
+
+HEX_DIGITS = frozenset("0123456789abcdefABCDEF")
+
+
+def read_digests(path: str, plaintext: bool) -> Iterator[bytes]:
+    with open(path, encoding="utf-8", errors="surrogateescape") as f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            if not line:
+                continue
+            if plaintext:
+                yield password_digest(line)
+                continue
+            digest = line.split(":", 1)[0]
+            if len(digest) != 40 or not HEX_DIGITS.issuperset(digest):
+                raise SystemExit(f"{path}: {line[:60]!r} is not a SHA-1 digest, pass --plaintext for password lists")
+            yield bytes.fromhex(digest)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="Password list or SHA-1 digest list")
+    parser.add_argument("output", help="Filter file to write")
+    parser.add_argument("--plaintext", action="store_true", help="The input holds passwords rather than SHA-1 digests")
+    parser.add_argument("--false-positive-rate", type=float, default=0.001)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    count = sum(1 for _ in read_digests(args.input, args.plaintext))
+    bits, probes = write_breach_filter(
+        args.output, read_digests(args.input, args.plaintext), count, args.false_positive_rate
+    )
+    print(
+        f"Wrote {args.output}: {count} entries, {bits // 8 / 2**20:.1f} MiB, {probes} probes per lookup, "
+        f"{time.perf_counter() - started:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
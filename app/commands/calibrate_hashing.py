@@ -0,0 +1,115 @@
+"""Recommend password hashing costs for this host.
+
+    python -m app.commands.calibrate_hashing [--target-ms 250] [--samples 5]
+
+Times single verifies at increasing costs and prints the highest settings
+whose median verify stays under the target, ready to paste into the
+environment. Run it on the production hardware, with nothing else busy:
+every login costs one verify, and each hashing worker does one at a time.
+"""
+import argparse
+import statistics
+import time
+from typing import Callable, List, Optional, Tuple
+
+from passlib.exc import MissingBackendError
+from passlib.hash import argon2, bcrypt
+
+from app.core.config import settings
+
+PASSWORD = "Calibration password 1!"
+BCRYPT_ROUNDS = range(8, 17)
+ARGON2_TIME_COSTS = range(1, 11)
+# Below this argon2id needs more passes than memory to be worth it (OWASP: 19 MiB, t=2)
+ARGON2_MIN_MEMORY_COST = 19456
+
+
+def median_verify_ms(handler, samples: int) -> float:
+    hashed = handler.hash(PASSWORD)
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        handler.verify(PASSWORD, hashed)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def highest_under(costs, make_handler: Callable, target_ms: float, samples: int, label: str) -> Optional[Tuple[int, float]]:
+    best = None
+    for cost in costs:
+        ms = median_verify_ms(make_handler(cost), samples)
+        print(f"  {label}={cost:<3} {ms:8.1f} ms")
+        if ms > target_ms:
+            break
+        best = (cost, ms)
+    return best
+
+
+def calibrate_bcrypt(target_ms: float, samples: int) -> Optional[Tuple[int, float]]:
+    print("bcrypt")
+    return highest_under(BCRYPT_ROUNDS, lambda rounds: bcrypt.using(rounds=rounds), target_ms, samples, "rounds")
+
+
+def calibrate_argon2(target_ms: float, samples: int, memory_cost: int) -> Optional[Tuple[int, int, float]]:
+    # Memory is the cost that hurts attackers most, so it is only given up when one pass is already too slow
+    while memory_cost >= ARGON2_MIN_MEMORY_COST:
+        print(f"argon2id, memory_cost={memory_cost} KiB")
+        best = highest_under(
+            ARGON2_TIME_COSTS,
+            lambda time_cost: argon2.using(type="ID", memory_cost=memory_cost, rounds=time_cost, parallelism=1),
+            target_ms,
+            samples,
+            "time_cost",
+        )
+        if best is not None:
+            return memory_cost, best[0], best[1]
+        memory_cost //= 2
+    return None
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target-ms", type=float, default=250.0, help="Highest acceptable median verify time")
+    parser.add_argument("--samples", type=int, default=5, help="Verifies timed per setting")
+    parser.add_argument("--memory-cost", type=int, default=settings.PASSWORD_ARGON2_MEMORY_COST, help="argon2 KiB to start from")
+    parser.add_argument("--workers", type=int, default=settings.PASSWORD_HASH_WORKERS, help="Hashing workers per process")
+    args = parser.parse_args(argv)
+
+    lines = []
+    verify_ms = None
+    try:
+        argon2_result = calibrate_argon2(args.target_ms, args.samples, args.memory_cost)
+    except MissingBackendError:
+        print("argon2: skipped, argon2-cffi is not installed")
+        argon2_result = None
+    bcrypt_result = calibrate_bcrypt(args.target_ms, args.samples)
+
+    if argon2_result is not None:
+        memory_cost, time_cost, verify_ms = argon2_result
+        lines += [
+            'PASSWORD_HASH_SCHEMES=["argon2", "bcrypt"]',
+            f"PASSWORD_ARGON2_MEMORY_COST={memory_cost}",
+            f"PASSWORD_ARGON2_TIME_COST={time_cost}",
+            "PASSWORD_ARGON2_PARALLELISM=1",
+        ]
+    if bcrypt_result is not None:
+        rounds, bcrypt_ms = bcrypt_result
+        if verify_ms is None:
+            lines.append('PASSWORD_HASH_SCHEMES=["bcrypt"]')
+            verify_ms = bcrypt_ms
+        lines.append(f"PASSWORD_BCRYPT_ROUNDS={rounds}")
+
+    print()
+    if verify_ms is None:
+        raise SystemExit(f"Even the cheapest settings take longer than {args.target_ms:g} ms to verify on this host")
+    print("Recommended settings:")
+    for line in lines:
+        print("  " + line)
+    print(f"About {args.workers * 1000 / verify_ms:.0f} logins/s per process with {args.workers} hashing workers", end="")
+    if argon2_result is not None:
+        print(f", using up to {args.workers * argon2_result[0] // 1024} MiB while all are busy", end="")
+    print(".")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Bulk import users from an NDJSON or CSV file.
+
+    python -m app.commands.import_users users.ndjson [--format csv] [--checkpoint users.ndjson.checkpoint]
+
+Each record has username, email, either password (plaintext, hashed here on
+a process pool) or password_hash (in one of PASSWORD_HASH_SCHEMES), and
+optionally is_active and is_verified. Existing usernames and emails are
+skipped. Progress is written to the checkpoint file after every committed
+chunk, and a rerun with the same checkpoint file carries on from there.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from typing import List, Optional
+
+from app.core.config import settings
+from app.core.user_import import FORMATS, UserImporter, read_file_lines, user_import_pool
+from app.core.worker_pool import BoundedWorkerPool
+
+
+def load_checkpoint(path: str) -> int:
+    if not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        return json.load(f)["checkpoint"]
+
+
+def save_checkpoint(path: str, progress: dict):
+    # Written aside and renamed, so a crash never leaves a half-written checkpoint
+    with open(path + ".tmp", "w") as f:
+        json.dump(progress, f)
+    os.replace(path + ".tmp", path)
+
+
+async def run(args) -> int:
+    start_at = load_checkpoint(args.checkpoint)
+    if start_at:
+        print(f"Resuming after record {start_at} from {args.checkpoint}", file=sys.stderr)
+    pool = user_import_pool
+    if args.workers:
+        pool = BoundedWorkerPool(
+            kind="process", max_workers=args.workers, max_queue=args.chunk_size, start_method="forkserver"
+        )
+    importer = UserImporter(args.format, chunk_size=args.chunk_size, pool=pool)
+    progress = None
+    try:
+        async for progress in importer.run(read_file_lines(args.input), start_at):
+            report = progress.as_dict()
+            save_checkpoint(args.checkpoint, report)
+            print(
+                "records {checkpoint:,} inserted {inserted:,} existing {existing:,} rejected {rejected:,} "
+                "({records_per_second:,.0f}/s)".format(**report),
+                file=sys.stderr,
+            )
+    finally:
+        pool.shutdown()
+    if progress is None:
+        print("Nothing to import", file=sys.stderr)
+        return 0
+    for error in progress.errors:
+        print(f"record {error['record']}: {error['error']}", file=sys.stderr)
+    if progress.rejected > len(progress.errors):
+        print(f"... and {progress.rejected - len(progress.errors)} more rejected", file=sys.stderr)
+    return 1 if progress.rejected else 0
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="NDJSON file, or CSV with a header row")
+    parser.add_argument("--format", choices=FORMATS, help="Defaults to the input's extension, else ndjson")
+    parser.add_argument("--checkpoint", help="Defaults to <input>.checkpoint")
+    parser.add_argument("--chunk-size", type=int, default=settings.USER_IMPORT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, help="Hashing processes, defaults to USER_IMPORT_HASH_WORKERS")
+    args = parser.parse_args(argv)
+    args.format = args.format or ("csv" if args.input.lower().endswith(".csv") else "ndjson")
+    args.checkpoint = args.checkpoint or args.input + ".checkpoint"
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
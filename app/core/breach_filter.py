@@ -0,0 +1,79 @@
+import hashlib
+import math
+import mmap
+import struct
+from typing import Iterable, Tuple
+
+MAGIC = b"PWBLOOM1"
+# Magic, number of bits, number of probes
+HEADER = struct.Struct("<8sQI")
+
+
+def password_digest(password: str) -> bytes:
+    # SHA-1 so Have I Been Pwned's hash dumps can be loaded without the plaintexts
+    return hashlib.sha1(password.encode()).digest()
+
+
+def _probes(digest: bytes, bits: int, probes: int) -> Iterable[int]:
+    # Double hashing: the digest is already uniform, its two halves give k independent-enough positions.
+    # BreachFilter.contains_digest inlines this, the two must stay in sync.
+    h1 = int.from_bytes(digest[:8], "little") % bits
+    h2 = (int.from_bytes(digest[8:16], "little") | 1) % bits
+    for _ in range(probes):
+        yield h1
+        h1 = (h1 + h2) % bits
+
+
+def filter_size(count: int, false_positive_rate: float) -> Tuple[int, int]:
+    """Returns the bits and probes of the smallest filter holding ``count`` entries at ``false_positive_rate``."""
+    bits = max(8, math.ceil(-count * math.log(false_positive_rate) / math.log(2) ** 2))
+    bits = (bits + 7) // 8 * 8
+    probes = max(1, round(bits / max(count, 1) * math.log(2)))
+    return bits, probes
+
+
+class BreachFilter:
+    """A Bloom filter of breached password SHA-1 digests, memory-mapped from a file.
+
+    Lookups read ``probes`` bytes of the mapping and nothing else, the OS page
+    cache keeps the hot parts in memory and shares them between workers.
+    A hit can be a false positive, a miss never is.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < HEADER.size:
+            raise ValueError(f"{path} is not a breach filter")
+        magic, self.bits, self.probes = HEADER.unpack_from(self._map)
+        if magic != MAGIC or len(self._map) != HEADER.size + self.bits // 8:
+            raise ValueError(f"{path} is not a breach filter")
+
+    def __contains__(self, password: str) -> bool:
+        return self.contains_digest(password_digest(password))
+
+    def contains_digest(self, digest: bytes) -> bool:
+        data, bits, offset = self._map, self.bits, HEADER.size
+        h1 = int.from_bytes(digest[:8], "little") % bits
+        h2 = (int.from_bytes(digest[8:16], "little") | 1) % bits
+        for _ in range(self.probes):
+            if not data[offset + (h1 >> 3)] & (1 << (h1 & 7)):
+                return False
+            h1 = (h1 + h2) % bits
+        return True
+
+    def close(self):
+        self._map.close()
+
+
+def write_breach_filter(path: str, digests: Iterable[bytes], count: int, false_positive_rate: float) -> Tuple[int, int]:
+    """Writes a filter sized for ``count`` digests; returns its bits and probes."""
+    bits, probes = filter_size(count, false_positive_rate)
+    data = bytearray(bits // 8)
+    for digest in digests:
+        for bit in _probes(digest, bits, probes):
+            data[bit >> 3] |= 1 << (bit & 7)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, bits, probes))
+        f.write(data)
+    return bits, probes
@@ -0,0 +1,65 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+
+
+class ClaimsCache:
+    """LRU cache of verified JWT claims, keyed by a digest of the raw token.
+
+    An entry never outlives the token's ``exp``. The cache only saves the
+    signature check and decoding; callers still consult the denylist on every
+    hit, and ``discard_jti`` drops a token as soon as it is revoked here.
+    """
+
+    def __init__(self, max_size: int = settings.CLAIMS_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[bytes, Tuple[dict, int]]" = OrderedDict()
+        self._keys_by_jti: Dict[str, bytes] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self.key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        claims, exp = entry
+        if exp <= time.time():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return claims
+
+    def set(self, token: str, claims: dict):
+        exp = claims.get("exp")
+        if self.max_size <= 0 or exp is None:
+            return
+        key = self.key(token)
+        self._entries[key] = (claims, exp)
+        self._entries.move_to_end(key)
+        self._keys_by_jti[claims["jti"]] = key
+        while len(self._entries) > self.max_size:
+            _, (evicted, _) = self._entries.popitem(last=False)
+            self._keys_by_jti.pop(evicted["jti"], None)
+
+    def discard_jti(self, jti: str):
+        key = self._keys_by_jti.pop(jti, None)
+        if key is not None:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+        self._keys_by_jti.clear()
+
+    def _remove(self, key: bytes):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._keys_by_jti.pop(entry[0]["jti"], None)
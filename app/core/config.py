@@ -1,3 +1,5 @@
+from typing import Dict, List, Optional, Tuple
+
 from pydantic_settings import BaseSettings
 
 
@@ -6,8 +8,120 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
     SECRET_KEY: str
+    # Each worker process has its own pool: the database sees up to
+    # workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 500
+    # Read-only lookups are spread over these when set, e.g. ["postgresql+asyncpg://.../replica1"]
+    DATABASE_REPLICA_URLS: List[str] = []
+    # "round_robin" or "least_connections"
+    DB_REPLICA_BALANCING: str = "round_robin"
+    DB_REPLICA_HEALTH_CHECK_SECONDS: float = 5.0
+    DB_REPLICA_HEALTH_CHECK_TIMEOUT_SECONDS: float = 1.0
+    # How long a client reads from the primary after one of its requests wrote
+    DB_REPLICA_PIN_SECONDS: float = 5.0
+    # gunicorn.conf.py; WEB_CONCURRENCY defaults to one worker per available CPU
+    WEB_BIND: str = "0.0.0.0:8000"
+    WEB_CONCURRENCY: Optional[int] = None
+    WEB_KEEPALIVE_SECONDS: int = 5
+    WEB_GRACEFUL_TIMEOUT_SECONDS: int = 30
+    # Peers (addresses or networks) whose X-Forwarded-For is believed for the client IP,
+    # which the per-IP rate limits key on. Set it to the load balancer's addresses.
+    TRUSTED_PROXIES: List[str] = ["127.0.0.1", "::1"]
+    # Each warm-up step (connections, statements, password hashing) gets this long;
+    # /health/ready answers 503 until they have all succeeded
+    WARM_UP_TIMEOUT_SECONDS: float = 30.0
+    WARM_UP_RETRY_SECONDS: float = 5.0
+    # Bulk user import (POST /api/v1/users/import, python -m app.commands.import_users):
+    # records per transaction, and processes hashing plaintext passwords (default: one per CPU)
+    USER_IMPORT_CHUNK_SIZE: int = 1000
+    USER_IMPORT_HASH_WORKERS: Optional[int] = None
+    # Routed through the application log pipeline rather than SQLAlchemy's own stdout handler
+    DB_ECHO: bool = False
+    LOG_LEVEL: str = "INFO"
+    # Fraction of sub-WARNING records kept per logger, e.g. {"app.api.v1.endpoints.auth": 0.1}
+    LOG_SAMPLE_RATES: Dict[str, float] = {}
     DENIED_TOKEN_CLEAN_UP_MINUTES: int = 10
     PASSWORD_RESET_TOKEN_EXPIRE_HOURS: int = 24
+    # "memory" only works for a single worker, use "sql" or "redis" when scaling out
+    DENYLIST_BACKEND: str = "memory"
+    DENYLIST_BATCH_SIZE: int = 100
+    DENYLIST_FLUSH_INTERVAL_SECONDS: float = 0.5
+    DENYLIST_NEGATIVE_CACHE_SECONDS: float = 2.0
+    DENYLIST_NEGATIVE_CACHE_SIZE: int = 100_000
+    REDIS_URL: Optional[str] = None
+    # "thread" or "process"; bcrypt and argon2 release the GIL so threads are usually enough
+    PASSWORD_HASH_POOL: str = "thread"
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE_SIZE: int = 64
+    PASSWORD_HASH_RETRY_AFTER_SECONDS: int = 1
+    # New hashes use the first scheme; hashes in the others, or with a lower cost than
+    # configured below, are rehashed on the next successful login.
+    # python -m app.commands.calibrate_hashing recommends costs for this host.
+    PASSWORD_HASH_SCHEMES: List[str] = ["argon2", "bcrypt"]
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_ARGON2_TIME_COST: int = 2
+    # KiB per hash, and every busy hashing worker holds that much at once
+    PASSWORD_ARGON2_MEMORY_COST: int = 19456
+    PASSWORD_ARGON2_PARALLELISM: int = 1
+    PASSWORD_MIN_LENGTH: int = 8
+    # Any of "uppercase", "lowercase", "digit", "special"
+    PASSWORD_REQUIRED_CLASSES: List[str] = ["uppercase", "lowercase", "digit", "special"]
+    # Bloom filter built by python -m app.commands.build_breach_filter; unset disables the check
+    PASSWORD_BREACH_FILTER_PATH: Optional[str] = None
+    # Upper bound on how long another worker's logout can go unnoticed here
+    SESSION_CACHE_TTL_SECONDS: float = 30.0
+    SESSION_CACHE_SIZE: int = 100_000
+    # User id, username and flags looked up on token refresh and password change; 0 disables the cache
+    IDENTITY_CACHE_SIZE: int = 100_000
+    IDENTITY_CACHE_TTL_SECONDS: float = 60.0
+    # How invalidations reach the other workers: "memory" (single worker), "postgres" or "redis"
+    IDENTITY_CACHE_BUS: str = "memory"
+    IDENTITY_CACHE_CHANNEL: str = "identity_invalidation"
+    # Verified access token claims kept per worker; 0 disables the cache
+    CLAIMS_CACHE_SIZE: int = 50_000
+    MAINTENANCE_ENABLED: bool = True
+    MAINTENANCE_INTERVAL_SECONDS: float = 300.0
+    MAINTENANCE_JITTER_SECONDS: float = 30.0
+    MAINTENANCE_BATCH_SIZE: int = 1000
+    # Caps one run; anything left over is picked up by the next one
+    MAINTENANCE_MAX_BATCHES: int = 100
+    MAINTENANCE_LEASE_SECONDS: int = 120
+    # How long used, expired or logged-out rows are kept before being swept
+    MAINTENANCE_RETENTION_HOURS: int = 24
+    EMAIL_VERIFICATION_TOKEN_EXPIRE_HOURS: int = 48
+    # "memory" counts per worker, use "redis" to share the counters
+    RATE_LIMIT_BACKEND: str = "memory"
+    # Rule -> (max hits, window seconds); a rule missing here is not enforced
+    RATE_LIMITS: Dict[str, Tuple[int, int]] = {
+        "login:ip": (30, 60),
+        "login:username": (10, 300),
+        "register:ip": (10, 3600),
+        "password_reset:ip": (10, 3600),
+        "password_reset:email": (3, 3600),
+    }
+    # Counters per rule in the memory backend, 4 bytes each, times two windows
+    RATE_LIMIT_SKETCH_WIDTH: int = 32768
+    RATE_LIMIT_SKETCH_DEPTH: int = 2
+    # Outbound email; without SMTP_HOST messages are queued in the outbox but not sent
+    SMTP_HOST: Optional[str] = None
+    SMTP_PORT: int = 25
+    SMTP_USERNAME: Optional[str] = None
+    SMTP_PASSWORD: Optional[str] = None
+    SMTP_STARTTLS: bool = False
+    SMTP_POOL_SIZE: int = 2
+    SMTP_TIMEOUT_SECONDS: float = 10.0
+    MAIL_FROM: str = "no-reply@localhost"
+    OUTBOX_BATCH_SIZE: int = 50
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 1.0
+    OUTBOX_CLAIM_SECONDS: int = 60
+    OUTBOX_MAX_ATTEMPTS: int = 8
+    OUTBOX_RETRY_BASE_SECONDS: float = 5.0
+    OUTBOX_RETRY_MAX_SECONDS: float = 3600.0
 
     class Config:
         env_file = ".env"
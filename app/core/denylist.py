@@ -0,0 +1,50 @@
+import heapq
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class Denylist:
+    def __init__(self):
+        self._expiry: Dict[str, int] = {}
+        self._heap: List[Tuple[int, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._expiry)
+
+    def __contains__(self, jti: str) -> bool:
+        exp = self._expiry.get(jti)
+        if exp is None:
+            return False
+        return exp >= _now()
+
+    def add(self, jti: str, exp: int):
+        self.purge_expired()
+        current = self._expiry.get(jti)
+        if current is not None and current >= exp:
+            return
+        self._expiry[jti] = exp
+        heapq.heappush(self._heap, (exp, jti))
+
+    def get(self, jti: str) -> Optional[int]:
+        return self._expiry.get(jti)
+
+    def purge_expired(self, now: Optional[int] = None) -> int:
+        if now is None:
+            now = _now()
+        heap = self._heap
+        removed = 0
+        while heap and heap[0][0] < now:
+            exp, jti = heapq.heappop(heap)
+            # A jti re-added with a later exp leaves a stale heap entry behind
+            if self._expiry.get(jti) == exp:
+                del self._expiry[jti]
+                removed += 1
+        return removed
+
+    def clear(self):
+        self._expiry.clear()
+        self._heap.clear()
+
+
+def _now() -> int:
+    return int(time.time())
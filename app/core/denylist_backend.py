@@ -0,0 +1,313 @@
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.config import settings
+from app.core.denylist import Denylist
+from app.db.dml import insert_ignoring_duplicates
+from app.db.session import AsyncSessionLocal
+from app.models.revoked_subject import RevokedSubject
+from app.models.revoked_token import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+
+class DenylistBackend(ABC):
+    """Access token denylist shared between workers.
+
+    Revocations are applied to a local store immediately and written to the
+    shared store in batches. Lookups for unknown jtis are remembered for a few
+    seconds, so the common "not revoked" answer rarely needs a round trip. The
+    price is that a revocation issued on another worker can take up to
+    flush interval + negative cache TTL to be observed here.
+
+    Besides single jtis, a whole subject can be revoked with a watermark: every
+    token for it issued before a given second is rejected. The watermark only
+    has to outlive the tokens it covers, so it expires after ``subject_ttl_seconds``.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = settings.DENYLIST_BATCH_SIZE,
+        negative_cache_seconds: float = settings.DENYLIST_NEGATIVE_CACHE_SECONDS,
+        negative_cache_size: int = settings.DENYLIST_NEGATIVE_CACHE_SIZE,
+        subject_ttl_seconds: int = max(settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60, int(settings.SESSION_CACHE_TTL_SECONDS)),
+    ):
+        self.batch_size = batch_size
+        self.negative_cache_seconds = negative_cache_seconds
+        self.negative_cache_size = negative_cache_size
+        self.subject_ttl_seconds = subject_ttl_seconds
+        self._local = Denylist()
+        self._subjects: Dict[str, Tuple[int, int]] = {}
+        self._pending: List[Tuple[str, int]] = []
+        self._negative: "OrderedDict[str, float]" = OrderedDict()
+
+    def is_revoked_locally(self, jti: str) -> bool:
+        return jti in self._local
+
+    async def is_revoked(self, jti: str) -> bool:
+        if jti in self._local:
+            return True
+
+        now = time.monotonic()
+        cached_until = self._negative.get(jti)
+        if cached_until is not None and cached_until > now:
+            return False
+
+        exp = await self._fetch(jti)
+        if exp is not None:
+            self._local.add(jti, exp)
+            return True
+
+        self._remember_not_revoked(jti, now)
+        return False
+
+    async def revoke(self, jti: str, exp: int):
+        self._local.add(jti, exp)
+        self._negative.pop(jti, None)
+        self._pending.append((jti, exp))
+        if len(self._pending) >= self.batch_size:
+            try:
+                await self.flush()
+            except Exception:
+                # Already applied locally and still queued, the background flush retries it
+                logger.exception("Denylist flush failed", extra={"pending": len(self._pending)})
+
+    def is_subject_revoked_locally(self, subject: str, issued_at: int) -> bool:
+        watermark = self._subjects.get(subject)
+        return watermark is not None and issued_at < watermark[0] and watermark[1] >= int(time.time())
+
+    async def is_subject_revoked(self, subject: str, issued_at: int) -> bool:
+        if self.is_subject_revoked_locally(subject, issued_at):
+            return True
+
+        # Shares the negative cache with jtis; the prefix cannot clash with a uuid
+        key = "sub:" + subject
+        now = time.monotonic()
+        cached_until = self._negative.get(key)
+        if cached_until is not None and cached_until > now:
+            return False
+
+        watermark = await self._fetch_subject(subject)
+        if watermark is not None:
+            self._remember_subject(subject, *watermark)
+        self._remember_not_revoked(key, now)
+        return self.is_subject_revoked_locally(subject, issued_at)
+
+    async def revoke_subject(self, subject: str, issued_before: int):
+        expires_at = issued_before + self.subject_ttl_seconds
+        self._remember_subject(subject, issued_before, expires_at)
+        self._negative.pop("sub:" + subject, None)
+        # Rare enough to be written straight through rather than batched
+        await self._write_subject(subject, issued_before, expires_at)
+
+    async def flush(self):
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        try:
+            await self._write(batch)
+        except Exception:
+            self._pending[:0] = batch
+            raise
+
+    async def purge_expired(self):
+        self._local.purge_expired()
+        now = int(time.time())
+        self._subjects = {subject: w for subject, w in self._subjects.items() if w[1] >= now}
+        await self._purge(now)
+
+    async def close(self):
+        await self.flush()
+
+    def _remember_not_revoked(self, jti: str, now: float):
+        negative = self._negative
+        negative[jti] = now + self.negative_cache_seconds
+        negative.move_to_end(jti)
+        # Entries share one TTL, so insertion order is also expiry order
+        while len(negative) > self.negative_cache_size:
+            negative.popitem(last=False)
+
+    def _remember_subject(self, subject: str, issued_before: int, expires_at: int):
+        current = self._subjects.get(subject)
+        if current is None or issued_before >= current[0]:
+            self._subjects[subject] = (issued_before, expires_at)
+
+    @abstractmethod
+    async def _fetch(self, jti: str) -> Optional[int]:
+        ...
+
+    @abstractmethod
+    async def _fetch_subject(self, subject: str) -> Optional[Tuple[int, int]]:
+        ...
+
+    @abstractmethod
+    async def _write_subject(self, subject: str, issued_before: int, expires_at: int):
+        ...
+
+    @abstractmethod
+    async def _write(self, batch: List[Tuple[str, int]]):
+        ...
+
+    @abstractmethod
+    async def _purge(self, now: int):
+        ...
+
+
+class MemoryDenylistBackend(DenylistBackend):
+    async def is_revoked(self, jti: str) -> bool:
+        return jti in self._local
+
+    async def revoke(self, jti: str, exp: int):
+        self._local.add(jti, exp)
+
+    async def is_subject_revoked(self, subject: str, issued_at: int) -> bool:
+        return self.is_subject_revoked_locally(subject, issued_at)
+
+    async def _fetch(self, jti: str) -> Optional[int]:
+        return None
+
+    async def _fetch_subject(self, subject: str) -> Optional[Tuple[int, int]]:
+        return None
+
+    async def _write_subject(self, subject: str, issued_before: int, expires_at: int):
+        pass
+
+    async def _write(self, batch: List[Tuple[str, int]]):
+        pass
+
+    async def _purge(self, now: int):
+        pass
+
+
+class SQLDenylistBackend(DenylistBackend):
+    def __init__(self, session_factory=AsyncSessionLocal, **kwargs):
+        super().__init__(**kwargs)
+        self._session_factory = session_factory
+
+    async def _fetch(self, jti: str) -> Optional[int]:
+        async with self._session_factory() as db:
+            result = await db.execute(
+                select(RevokedToken.expires_at).filter(
+                    RevokedToken.jti == jti, RevokedToken.expires_at >= int(time.time())
+                )
+            )
+            return result.scalar()
+
+    async def _fetch_subject(self, subject: str) -> Optional[Tuple[int, int]]:
+        async with self._session_factory() as db:
+            result = await db.execute(
+                select(RevokedSubject.issued_before, RevokedSubject.expires_at).filter(
+                    RevokedSubject.subject == subject, RevokedSubject.expires_at >= int(time.time())
+                )
+            )
+            row = result.first()
+            return tuple(row) if row is not None else None
+
+    async def _write(self, batch: List[Tuple[str, int]]):
+        rows = _dedupe(batch)
+        async with self._session_factory() as db:
+            await db.execute(insert_ignoring_duplicates(db, RevokedToken, index_elements=["jti"]).values(rows))
+            await db.commit()
+
+    async def _write_subject(self, subject: str, issued_before: int, expires_at: int):
+        async with self._session_factory() as db:
+            await db.execute(_upsert_subject(db, subject, issued_before, expires_at))
+            await db.commit()
+
+    async def _purge(self, now: int):
+        async with self._session_factory() as db:
+            await db.execute(delete(RevokedToken).where(RevokedToken.expires_at < now))
+            await db.execute(delete(RevokedSubject).where(RevokedSubject.expires_at < now))
+            await db.commit()
+
+
+class RedisDenylistBackend(DenylistBackend):
+    def __init__(self, client=None, url: Optional[str] = settings.REDIS_URL, prefix: str = "denylist:", **kwargs):
+        super().__init__(**kwargs)
+        if client is None:
+            if not url:
+                raise ValueError("REDIS_URL must be set to use the redis denylist backend")
+            from redis import asyncio as aioredis
+
+            client = aioredis.from_url(url)
+        self._client = client
+        self._prefix = prefix
+
+    async def _fetch(self, jti: str) -> Optional[int]:
+        value = await self._client.get(self._prefix + jti)
+        if value is None:
+            return None
+        return int(value)
+
+    async def _fetch_subject(self, subject: str) -> Optional[Tuple[int, int]]:
+        value = await self._client.get(self._prefix + "sub:" + subject)
+        if value is None:
+            return None
+        if isinstance(value, bytes):
+            value = value.decode()
+        issued_before, _, expires_at = value.partition(":")
+        return int(issued_before), int(expires_at)
+
+    async def _write(self, batch: List[Tuple[str, int]]):
+        now = int(time.time())
+        async with self._client.pipeline(transaction=False) as pipe:
+            for row in _dedupe(batch):
+                if row["expires_at"] > now:
+                    pipe.set(self._prefix + row["jti"], row["expires_at"], exat=row["expires_at"])
+            await pipe.execute()
+
+    async def _write_subject(self, subject: str, issued_before: int, expires_at: int):
+        await self._client.set(self._prefix + "sub:" + subject, "%d:%d" % (issued_before, expires_at), exat=expires_at)
+
+    async def _purge(self, now: int):
+        # Keys carry their own expiry
+        pass
+
+    async def close(self):
+        await super().close()
+        await self._client.aclose()
+
+
+def create_denylist_backend(name: str = settings.DENYLIST_BACKEND) -> DenylistBackend:
+    backends = {
+        "memory": MemoryDenylistBackend,
+        "sql": SQLDenylistBackend,
+        "redis": RedisDenylistBackend,
+    }
+    if name not in backends:
+        raise ValueError("Unknown denylist backend %r, expected one of %s" % (name, ", ".join(backends)))
+    return backends[name]()
+
+
+def _dedupe(batch: Iterable[Tuple[str, int]]) -> List[Dict]:
+    latest: Dict[str, int] = {}
+    for jti, exp in batch:
+        if exp > latest.get(jti, 0):
+            latest[jti] = exp
+    return [{"jti": jti, "expires_at": exp} for jti, exp in latest.items()]
+
+
+def _upsert_subject(db: AsyncSession, subject: str, issued_before: int, expires_at: int):
+    values = {"subject": subject, "issued_before": issued_before, "expires_at": expires_at}
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+        stmt = mysql_insert(RevokedSubject).values(values)
+        return stmt.on_duplicate_key_update(issued_before=stmt.inserted.issued_before, expires_at=stmt.inserted.expires_at)
+    stmt = dialect_insert(RevokedSubject).values(values)
+    return stmt.on_conflict_do_update(
+        index_elements=["subject"],
+        set_={"issued_before": stmt.excluded.issued_before, "expires_at": stmt.excluded.expires_at},
+    )
@@ -0,0 +1,230 @@
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+import ulid
+from sqlalchemy import text
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class UserIdentity(NamedTuple):
+    id: ulid.ULID
+    username: str
+    is_active: bool
+    is_verified: bool
+    # User.password_version, which changes with the password; the hash itself is never read. A password
+    # change compares it with the primary's, so a stale entry cannot overwrite a newer password
+    password_version: int
+
+
+class InvalidationBus(ABC):
+    """Carries identity invalidations to the other workers.
+
+    Messages are "<user id>:<username>", either part may be empty.
+    """
+
+    retry_seconds = 1.0
+
+    @abstractmethod
+    async def publish(self, message: str):
+        ...
+
+    @abstractmethod
+    async def listen(self, handle: Callable[[str], None], reset: Callable[[], None]):
+        """Calls ``handle`` for every message until cancelled, and ``reset`` whenever messages may have been missed."""
+
+    async def close(self):
+        pass
+
+
+class MemoryInvalidationBus(InvalidationBus):
+    async def publish(self, message: str):
+        pass
+
+    async def listen(self, handle: Callable[[str], None], reset: Callable[[], None]):
+        pass
+
+
+class PostgresInvalidationBus(InvalidationBus):
+    """LISTEN/NOTIFY on the primary; the listener holds one connection of its pool."""
+
+    def __init__(self, engine=None, channel: str = settings.IDENTITY_CACHE_CHANNEL):
+        if engine is None:
+            from app.db.session import engine
+        if engine.dialect.driver != "asyncpg":
+            raise ValueError("The postgres identity cache bus needs a postgresql+asyncpg DATABASE_URL")
+        self._engine = engine
+        self.channel = channel
+
+    async def publish(self, message: str):
+        async with self._engine.connect() as conn:
+            await conn.execute(text("SELECT pg_notify(:channel, :message)"), {"channel": self.channel, "message": message})
+            await conn.commit()
+
+    async def listen(self, handle: Callable[[str], None], reset: Callable[[], None]):
+        def on_notify(connection, pid, channel, payload):
+            handle(payload)
+
+        while True:
+            try:
+                async with self._engine.connect() as conn:
+                    driver_connection = (await conn.get_raw_connection()).driver_connection
+                    closed = asyncio.Event()
+                    driver_connection.add_termination_listener(lambda connection: closed.set())
+                    await driver_connection.add_listener(self.channel, on_notify)
+                    try:
+                        reset()
+                        await closed.wait()
+                    finally:
+                        if not driver_connection.is_closed():
+                            await driver_connection.remove_listener(self.channel, on_notify)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Identity cache listener failed", extra={"channel": self.channel})
+            reset()
+            await asyncio.sleep(self.retry_seconds)
+
+
+class RedisInvalidationBus(InvalidationBus):
+    def __init__(self, client=None, url: Optional[str] = settings.REDIS_URL, channel: str = settings.IDENTITY_CACHE_CHANNEL):
+        if client is None:
+            if not url:
+                raise ValueError("REDIS_URL must be set to use the redis identity cache bus")
+            from redis import asyncio as aioredis
+
+            client = aioredis.from_url(url)
+        self._client = client
+        self.channel = channel
+
+    async def publish(self, message: str):
+        await self._client.publish(self.channel, message)
+
+    async def listen(self, handle: Callable[[str], None], reset: Callable[[], None]):
+        while True:
+            try:
+                async with self._client.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    reset()
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            data = message["data"]
+                            handle(data.decode() if isinstance(data, bytes) else data)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Identity cache listener failed", extra={"channel": self.channel})
+            reset()
+            await asyncio.sleep(self.retry_seconds)
+
+    async def close(self):
+        await self._client.aclose()
+
+
+def create_invalidation_bus(name: str = settings.IDENTITY_CACHE_BUS) -> InvalidationBus:
+    buses = {
+        "memory": MemoryInvalidationBus,
+        "postgres": PostgresInvalidationBus,
+        "redis": RedisInvalidationBus,
+    }
+    if name not in buses:
+        raise ValueError("Unknown identity cache bus %r, expected one of %s" % (name, ", ".join(buses)))
+    return buses[name]()
+
+
+class IdentityCache:
+    """LRU cache of UserIdentity by username and by id, with a TTL.
+
+    Writers call ``invalidate``, which drops the entry here and tells the other
+    workers through the bus. An entry read before an invalidation landed is
+    not stored (see ``version``), so a missed message can only leave an entry
+    stale for up to ``ttl_seconds``.
+    """
+
+    def __init__(
+        self,
+        bus: Optional[InvalidationBus] = None,
+        max_size: int = settings.IDENTITY_CACHE_SIZE,
+        ttl_seconds: float = settings.IDENTITY_CACHE_TTL_SECONDS,
+    ):
+        self.bus = bus if bus is not None else create_invalidation_bus()
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        # Bumped by every invalidation; take it before reading the database and pass it to set()
+        self.version = 0
+        self._entries: "OrderedDict[str, Tuple[UserIdentity, float]]" = OrderedDict()
+        self._usernames: Dict[ulid.ULID, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_by_username(self, username: str) -> Optional[UserIdentity]:
+        entry = self._entries.get(username)
+        if entry is None:
+            return None
+        identity, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._remove(username)
+            return None
+        self._entries.move_to_end(username)
+        return identity
+
+    def get_by_id(self, user_id: ulid.ULID) -> Optional[UserIdentity]:
+        username = self._usernames.get(user_id)
+        if username is None:
+            return None
+        return self.get_by_username(username)
+
+    def set(self, identity: UserIdentity, version: int):
+        if self.max_size <= 0 or version != self.version:
+            return
+        self._remove(identity.username)
+        self._entries[identity.username] = (identity, time.monotonic() + self.ttl_seconds)
+        self._usernames[identity.id] = identity.username
+        while len(self._entries) > self.max_size:
+            self._remove(next(iter(self._entries)))
+
+    def discard(self, user_id: Optional[ulid.ULID] = None, username: Optional[str] = None):
+        self.version += 1
+        if user_id is not None:
+            cached_username = self._usernames.get(user_id)
+            if cached_username is not None:
+                self._remove(cached_username)
+        if username:
+            self._remove(username)
+
+    def clear(self):
+        self.version += 1
+        self._entries.clear()
+        self._usernames.clear()
+
+    async def invalidate(self, user_id: Optional[ulid.ULID] = None, username: Optional[str] = None):
+        self.discard(user_id, username)
+        try:
+            await self.bus.publish("%s:%s" % (user_id or "", username or ""))
+        except Exception:
+            logger.exception("Identity cache invalidation could not be published", extra={"username": username})
+
+    async def listen(self):
+        await self.bus.listen(self._handle, self.clear)
+
+    async def close(self):
+        await self.bus.close()
+
+    def _handle(self, message: str):
+        user_id, _, username = message.partition(":")
+        try:
+            self.discard(ulid.from_str(user_id) if user_id else None, username)
+        except ValueError:
+            logger.warning("Ignoring malformed identity cache invalidation", extra={"payload": message})
+
+    def _remove(self, username: str):
+        entry = self._entries.pop(username, None)
+        if entry is not None:
+            self._usernames.pop(entry[0].id, None)
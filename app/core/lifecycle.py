@@ -0,0 +1,117 @@
+import asyncio
+import inspect
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Coroutine, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Measured from this import; gunicorn.conf.py resets it in each forked worker
+STARTED_AT = time.time()
+
+
+class Lifecycle:
+    """Background jobs, warm-up and shutdown, driven by the lifespan in app.main.
+
+    Jobs are held until shutdown, which cancels them, runs the closers in
+    reverse order of registration and then forgets the warm-ups and closers,
+    so a later lifespan in the same process starts afresh. The app is ready
+    (see /health/ready) once every warm-up step has succeeded; a failed
+    warm-up is retried in the background until it does.
+    """
+
+    def __init__(
+        self,
+        started_at: float = STARTED_AT,
+        warm_up_timeout_seconds: float = settings.WARM_UP_TIMEOUT_SECONDS,
+        warm_up_retry_seconds: float = settings.WARM_UP_RETRY_SECONDS,
+    ):
+        self.started_at = started_at
+        self.warm_up_timeout_seconds = warm_up_timeout_seconds
+        self.warm_up_retry_seconds = warm_up_retry_seconds
+        self.ready = False
+        self.startup_seconds: Optional[float] = None
+        self._jobs: Dict[str, asyncio.Task] = {}
+        self._warm_ups: List[Tuple[str, Callable[[], Awaitable]]] = []
+        self._closers: List[Tuple[str, Callable]] = []
+
+    def add_job(self, name: str, coro: Coroutine) -> asyncio.Task:
+        task = asyncio.create_task(coro, name=name)
+        self._jobs[name] = task
+        task.add_done_callback(self._job_done)
+        return task
+
+    def add_warm_up(self, name: str, step: Callable[[], Awaitable]):
+        self._warm_ups.append((name, step))
+
+    def add_closer(self, name: str, close: Callable):
+        """``close`` may be sync or async."""
+        self._closers.append((name, close))
+
+    async def start(self):
+        if await self._warm_up():
+            self._mark_ready()
+        else:
+            self.add_job("warm_up", self._retry_warm_up())
+
+    async def shutdown(self):
+        self.ready = False
+        jobs = list(self._jobs.values())
+        for task in jobs:
+            task.cancel()
+        await asyncio.gather(*jobs, return_exceptions=True)
+        for name, close in reversed(self._closers):
+            try:
+                result = close()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                logger.exception("Shutdown step failed", extra={"step": name})
+        # The next lifespan in this process (tests, benchmarks) registers its own
+        self._warm_ups.clear()
+        self._closers.clear()
+
+    def metrics(self) -> Dict:
+        return {"ready": self.ready, "startup_seconds": self.startup_seconds, "jobs": sorted(self._jobs)}
+
+    async def _warm_up(self) -> bool:
+        for name, step in self._warm_ups:
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(step(), self.warm_up_timeout_seconds)
+            except Exception:
+                logger.exception("Warm-up step failed", extra={"step": name})
+                return False
+            logger.debug("Warm-up step done", extra={"step": name, "seconds": round(time.perf_counter() - started, 3)})
+        return True
+
+    async def _retry_warm_up(self):
+        while True:
+            await asyncio.sleep(self.warm_up_retry_seconds)
+            if await self._warm_up():
+                self._mark_ready()
+                return
+
+    def _mark_ready(self):
+        self.ready = True
+        self.startup_seconds = time.time() - self.started_at
+        logger.info("Ready", extra={"startup_seconds": round(self.startup_seconds, 3), "pid": os.getpid()})
+
+    def _job_done(self, task: asyncio.Task):
+        if self._jobs.get(task.get_name()) is task:
+            del self._jobs[task.get_name()]
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Background job stopped", exc_info=task.exception(), extra={"job": task.get_name()})
+
+
+lifecycle = Lifecycle()
+metrics.register_gauge("app_ready", "1 once the warm-up has finished.", lambda: float(lifecycle.ready))
+metrics.register_gauge(
+    "app_startup_seconds",
+    "Seconds from this worker starting until it was ready.",
+    lambda: lifecycle.startup_seconds or 0.0,
+)
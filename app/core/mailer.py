@@ -0,0 +1,88 @@
+import asyncio
+import smtplib
+from email.message import EmailMessage
+from typing import List, Optional
+
+from app.core.config import settings
+
+
+class SMTPConnectionPool:
+    """A few long-lived SMTP connections, used from worker threads.
+
+    smtplib is blocking, so every send runs in a thread. Connections are opened
+    lazily, reused across sends and reopened when the server has dropped them.
+    """
+
+    def __init__(
+        self,
+        host: Optional[str] = settings.SMTP_HOST,
+        port: int = settings.SMTP_PORT,
+        username: Optional[str] = settings.SMTP_USERNAME,
+        password: Optional[str] = settings.SMTP_PASSWORD,
+        starttls: bool = settings.SMTP_STARTTLS,
+        size: int = settings.SMTP_POOL_SIZE,
+        timeout: float = settings.SMTP_TIMEOUT_SECONDS,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self._idle: asyncio.Queue = asyncio.Queue()
+        for _ in range(size):
+            self._idle.put_nowait(None)
+
+    async def send(self, message: EmailMessage):
+        connection = await self._idle.get()
+        try:
+            connection = await asyncio.to_thread(self._send, connection, message)
+        except Exception:
+            # _send has already closed it
+            connection = None
+            raise
+        finally:
+            self._idle.put_nowait(connection)
+
+    async def close(self):
+        connections: List[smtplib.SMTP] = []
+        while not self._idle.empty():
+            connection = self._idle.get_nowait()
+            if connection is not None:
+                connections.append(connection)
+        for connection in connections:
+            await asyncio.to_thread(_quit, connection)
+
+    def _send(self, connection: Optional[smtplib.SMTP], message: EmailMessage) -> smtplib.SMTP:
+        if connection is not None:
+            try:
+                connection.send_message(message)
+                return connection
+            except smtplib.SMTPServerDisconnected:
+                # The server closed the idle connection, retry once on a fresh one
+                pass
+            except Exception:
+                _quit(connection)
+                raise
+        connection = self._connect()
+        try:
+            connection.send_message(message)
+        except Exception:
+            _quit(connection)
+            raise
+        return connection
+
+    def _connect(self) -> smtplib.SMTP:
+        connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            connection.starttls()
+        if self.username:
+            connection.login(self.username, self.password or "")
+        return connection
+
+
+def _quit(connection: smtplib.SMTP):
+    try:
+        connection.quit()
+    except (smtplib.SMTPException, OSError):
+        connection.close()
@@ -0,0 +1,80 @@
+import asyncio
+import logging
+import os
+import random
+import socket
+import uuid
+from typing import Dict
+
+from app.core.config import settings
+from app.crud.maintenance import SWEEPS, crud_maintenance
+from app.db.session import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+class MaintenanceScheduler:
+    """Periodically deletes expired sessions and one-time tokens in bounded batches.
+
+    Every sweep runs under a lease row, so with several workers only one of
+    them sweeps a given table at a time; the others skip it until the next run.
+    """
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        interval_seconds: float = settings.MAINTENANCE_INTERVAL_SECONDS,
+        jitter_seconds: float = settings.MAINTENANCE_JITTER_SECONDS,
+        batch_size: int = settings.MAINTENANCE_BATCH_SIZE,
+        max_batches: int = settings.MAINTENANCE_MAX_BATCHES,
+        lease_seconds: int = settings.MAINTENANCE_LEASE_SECONDS,
+    ):
+        self.interval_seconds = interval_seconds
+        self.jitter_seconds = jitter_seconds
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.lease_seconds = lease_seconds
+        self.owner = "%s:%d:%s" % (socket.gethostname(), os.getpid(), uuid.uuid4().hex[:8])
+        self._session_factory = session_factory
+
+    async def run_forever(self):
+        while True:
+            # Jitter keeps workers started together from hitting the lease at the same moment
+            await asyncio.sleep(self.interval_seconds + random.uniform(0, self.jitter_seconds))
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Maintenance run failed")
+
+    async def run_once(self) -> Dict[str, int]:
+        deleted = {}
+        for sweep in SWEEPS:
+            lease = "sweep:" + sweep
+            async with self._session_factory() as db:
+                if not await crud_maintenance.acquire_lease(db, lease, self.owner, self.lease_seconds):
+                    continue
+            try:
+                deleted[sweep] = await self._sweep(sweep, lease)
+            finally:
+                async with self._session_factory() as db:
+                    await crud_maintenance.release_lease(db, lease, self.owner)
+            if deleted[sweep]:
+                logger.info("Swept expired rows", extra={"table": sweep, "deleted": deleted[sweep]})
+        return deleted
+
+    async def _sweep(self, sweep: str, lease: str) -> int:
+        after_id = 0
+        total = 0
+        for _ in range(self.max_batches):
+            async with self._session_factory() as db:
+                ids = await crud_maintenance.delete_expired_batch(db, sweep, after_id, self.batch_size)
+                total += len(ids)
+                if len(ids) < self.batch_size:
+                    break
+                after_id = max(ids)
+                if not await crud_maintenance.acquire_lease(db, lease, self.owner, self.lease_seconds):
+                    logger.warning("Lost maintenance lease", extra={"table": sweep})
+                    break
+            # Let request handlers in between batches
+            await asyncio.sleep(0)
+        return total
@@ -0,0 +1,165 @@
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PHASE_DB = 0
+PHASE_BCRYPT = 1
+PHASE_JWT = 2
+PHASE_DENYLIST = 3
+PHASES = ("db", "bcrypt", "jwt", "denylist")
+
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        # One slot per bucket plus +Inf; cumulated only when rendered
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+class RouteMetrics:
+    __slots__ = ("duration", "statuses", "phase_seconds")
+
+    def __init__(self):
+        self.duration = Histogram()
+        self.statuses: Dict[int, int] = {}
+        self.phase_seconds = [0.0] * len(PHASES)
+
+
+class RequestTimings:
+    __slots__ = ("phases", "status")
+
+    def __init__(self):
+        self.phases = [0.0] * len(PHASES)
+        self.status = 500
+
+
+class Metrics:
+    def __init__(self):
+        self.in_flight = 0
+        self.routes: Dict[Tuple[str, str], RouteMetrics] = {}
+        self.phases = [Histogram() for _ in PHASES]
+        self.gauges: List[Tuple[str, str, Callable[[], float]]] = []
+
+    def route(self, method: str, path: str) -> RouteMetrics:
+        key = (method, path)
+        route = self.routes.get(key)
+        if route is None:
+            route = self.routes[key] = RouteMetrics()
+        return route
+
+    def register_gauge(self, name: str, help_text: str, read: Callable[[], float]):
+        self.gauges.append((name, help_text, read))
+
+    def render(self) -> str:
+        lines = [
+            "# HELP http_requests_in_flight Requests currently being served.",
+            "# TYPE http_requests_in_flight gauge",
+            "http_requests_in_flight %d" % self.in_flight,
+            "# HELP http_request_duration_seconds Request latency by route.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, path), route in self.routes.items():
+            _render_histogram(lines, "http_request_duration_seconds", 'method="%s",route="%s"' % (method, path), route.duration)
+
+        lines += ["# HELP http_requests_total Responses by route and status.", "# TYPE http_requests_total counter"]
+        for (method, path), route in self.routes.items():
+            for status, count in route.statuses.items():
+                lines.append('http_requests_total{method="%s",route="%s",status="%d"} %d' % (method, path, status, count))
+
+        lines += [
+            "# HELP http_request_phase_seconds_total Time spent per phase (db, bcrypt, jwt, denylist) by route.",
+            "# TYPE http_request_phase_seconds_total counter",
+        ]
+        for (method, path), route in self.routes.items():
+            for phase, seconds in zip(PHASES, route.phase_seconds):
+                lines.append(
+                    'http_request_phase_seconds_total{method="%s",route="%s",phase="%s"} %.6f' % (method, path, phase, seconds)
+                )
+
+        lines += ["# HELP auth_phase_duration_seconds Duration of individual phase calls.", "# TYPE auth_phase_duration_seconds histogram"]
+        for phase, histogram in zip(PHASES, self.phases):
+            _render_histogram(lines, "auth_phase_duration_seconds", 'phase="%s"' % phase, histogram)
+
+        for name, help_text, read in self.gauges:
+            lines += ["# HELP %s %s" % (name, help_text), "# TYPE %s gauge" % name, "%s %s" % (name, read())]
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+_current_request: ContextVar[Optional[RequestTimings]] = ContextVar("current_request", default=None)
+
+
+def record_phase(phase: int, seconds: float):
+    metrics.phases[phase].observe(seconds)
+    timings = _current_request.get()
+    if timings is not None:
+        timings.phases[phase] += seconds
+
+
+class timed_phase:
+    __slots__ = ("phase", "started")
+
+    def __init__(self, phase: int):
+        self.phase = phase
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        record_phase(self.phase, time.perf_counter() - self.started)
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current_request.set(timings)
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                timings.status = message["status"]
+            await send(message)
+
+        metrics.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.in_flight -= 1
+            _current_request.reset(token)
+            # Label by route template, never the raw path, to keep cardinality bounded
+            route = scope.get("route")
+            route_metrics = metrics.route(scope["method"], route.path if route is not None else "<unmatched>")
+            route_metrics.duration.observe(elapsed)
+            route_metrics.statuses[timings.status] = route_metrics.statuses.get(timings.status, 0) + 1
+            phase_seconds = route_metrics.phase_seconds
+            for i, seconds in enumerate(timings.phases):
+                phase_seconds[i] += seconds
+
+
+def _render_histogram(lines: List[str], name: str, labels: str, histogram: Histogram):
+    cumulative = 0
+    for bound, count in zip(BUCKETS, histogram.counts):
+        cumulative += count
+        lines.append('%s_bucket{%s,le="%g"} %d' % (name, labels, bound, cumulative))
+    lines.append('%s_bucket{%s,le="+Inf"} %d' % (name, labels, histogram.count))
+    lines.append("%s_sum{%s} %.6f" % (name, labels, histogram.sum))
+    lines.append("%s_count{%s} %d" % (name, labels, histogram.count))
@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import random
+import smtplib
+import time
+from email.message import EmailMessage
+from typing import List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.mailer import SMTPConnectionPool
+from app.crud.outbox import crud_outbox
+from app.db.session import AsyncSessionLocal
+from app.models.outbox_message import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+
+def queue_password_reset_email(db: AsyncSession, email: str, token: str):
+    hours = settings.PASSWORD_RESET_TOKEN_EXPIRE_HOURS
+    body = (
+        "Someone asked to reset the password of your account.\n\n"
+        f"Your reset token is:\n\n{token}\n\n"
+        f"It expires in {hours} hours. If this was not you, you can ignore this email.\n"
+    )
+    crud_outbox.add(db, "password_reset", email, "Reset your password", body)
+
+
+def queue_email_verification_email(db: AsyncSession, email: str, token: str):
+    hours = settings.EMAIL_VERIFICATION_TOKEN_EXPIRE_HOURS
+    body = f"Welcome! Confirm your email address with this token:\n\n{token}\n\nIt expires in {hours} hours.\n"
+    crud_outbox.add(db, "email_verification", email, "Confirm your email address", body)
+
+
+class OutboxDispatcher:
+    """Sends queued outbox messages in batches, with retries and exponential backoff.
+
+    Messages are claimed for ``claim_seconds`` before sending, so several
+    dispatchers can poll the same table; a message can be sent twice only if
+    a dispatcher dies between sending it and recording that it did.
+    """
+
+    def __init__(
+        self,
+        mailer: Optional[SMTPConnectionPool] = None,
+        session_factory=AsyncSessionLocal,
+        sender: str = settings.MAIL_FROM,
+        batch_size: int = settings.OUTBOX_BATCH_SIZE,
+        poll_interval_seconds: float = settings.OUTBOX_POLL_INTERVAL_SECONDS,
+        claim_seconds: int = settings.OUTBOX_CLAIM_SECONDS,
+        max_attempts: int = settings.OUTBOX_MAX_ATTEMPTS,
+        retry_base_seconds: float = settings.OUTBOX_RETRY_BASE_SECONDS,
+        retry_max_seconds: float = settings.OUTBOX_RETRY_MAX_SECONDS,
+    ):
+        self.mailer = mailer if mailer is not None else SMTPConnectionPool()
+        self.sender = sender
+        self.batch_size = batch_size
+        self.poll_interval_seconds = poll_interval_seconds
+        self.claim_seconds = claim_seconds
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self._session_factory = session_factory
+
+    async def run_forever(self):
+        try:
+            while True:
+                try:
+                    sent = await self.dispatch_once()
+                except Exception:
+                    logger.exception("Outbox dispatch failed")
+                    sent = 0
+                # A full batch means there is probably more waiting
+                if sent < self.batch_size:
+                    await asyncio.sleep(self.poll_interval_seconds)
+        finally:
+            await self.mailer.close()
+
+    async def dispatch_once(self) -> int:
+        async with self._session_factory() as db:
+            messages = await crud_outbox.claim_batch(db, self.batch_size, self.claim_seconds)
+        if not messages:
+            return 0
+
+        results = await asyncio.gather(*(self.mailer.send(self._email(m)) for m in messages), return_exceptions=True)
+
+        sent: List[int] = []
+        async with self._session_factory() as db:
+            for message, result in zip(messages, results):
+                if isinstance(result, BaseException):
+                    await self._record_failure(db, message, result)
+                else:
+                    sent.append(message.id)
+            await crud_outbox.mark_sent(db, sent)
+        return len(messages)
+
+    async def _record_failure(self, db: AsyncSession, message: OutboxMessage, error: BaseException):
+        attempts = message.attempts + 1
+        dead = attempts >= self.max_attempts or _is_permanent(error)
+        delay = min(self.retry_max_seconds, self.retry_base_seconds * 2 ** (attempts - 1))
+        retry_at = int(time.time() + delay * random.uniform(0.5, 1.0))
+        await crud_outbox.mark_failed(db, message.id, repr(error), retry_at, dead)
+        log = logger.error if dead else logger.warning
+        log(
+            "Outbox message not sent",
+            extra={"outbox_id": message.id, "kind": message.kind, "attempts": attempts, "dead": dead, "error": repr(error)},
+        )
+
+    def _email(self, message: OutboxMessage) -> EmailMessage:
+        email = EmailMessage()
+        email["From"] = self.sender
+        email["To"] = message.recipient
+        email["Subject"] = message.subject
+        email.set_content(message.body)
+        return email
+
+
+def _is_permanent(error: BaseException) -> bool:
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
@@ -0,0 +1,157 @@
+import hashlib
+import math
+import time
+from abc import ABC, abstractmethod
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+_MAX_COUNT = 2**32 - 1
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__("Rate limit exceeded")
+        self.retry_after = retry_after
+
+
+def _sliding_estimate(previous: float, current: float, elapsed: float, window: int) -> float:
+    # The previous window is assumed to have been evenly spread, only its overlapping part counts
+    return previous * (1 - elapsed / window) + current
+
+
+class SlidingWindowSketch:
+    """Approximate per-key hit counts over a sliding window in fixed memory.
+
+    A count-min sketch: ``depth`` rows of ``width`` 32-bit counters for the
+    current and the previous window. Collisions can only overestimate a
+    count, never hide hits, so an attacker cannot dodge the limit with them.
+    """
+
+    def __init__(self, window_seconds: int, width: int, depth: int):
+        self.window_seconds = window_seconds
+        self.width = width
+        self.depth = depth
+        self._current = self._empty_rows()
+        self._previous = self._empty_rows()
+        self._window_start = 0
+
+    def hit(self, key: str, now: float) -> Tuple[float, float]:
+        """Counts one hit for ``key``; returns the estimated count including it and the seconds into the window."""
+        self._rotate(now)
+        elapsed = now - self._window_start
+        estimate = math.inf
+        for row, slot in enumerate(self._slots(key)):
+            current = self._current[row]
+            if current[slot] < _MAX_COUNT:
+                current[slot] += 1
+            # Every row overestimates, the smallest is the closest
+            row_estimate = _sliding_estimate(self._previous[row][slot], current[slot], elapsed, self.window_seconds)
+            estimate = min(estimate, row_estimate)
+        return estimate, elapsed
+
+    def _rotate(self, now: float):
+        start = int(now // self.window_seconds) * self.window_seconds
+        if start == self._window_start:
+            return
+        if start - self._window_start == self.window_seconds:
+            self._previous = self._current
+        else:
+            self._previous = self._empty_rows()
+        self._current = self._empty_rows()
+        self._window_start = start
+
+    def _empty_rows(self) -> List[array]:
+        return [array("I", bytes(4 * self.width)) for _ in range(self.depth)]
+
+    def _slots(self, key: str) -> List[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=8 * self.depth).digest()
+        return [int.from_bytes(digest[8 * i : 8 * i + 8], "little") % self.width for i in range(self.depth)]
+
+
+class RateLimitBackend(ABC):
+    @abstractmethod
+    async def hit(self, rule: str, key: str, limit: int, window_seconds: int) -> Optional[int]:
+        """Counts a hit; returns seconds to wait if it is over ``limit``, None otherwise."""
+
+    async def close(self):
+        pass
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Per-worker counters; with N workers a client effectively gets N times the limit."""
+
+    def __init__(self, width: int = settings.RATE_LIMIT_SKETCH_WIDTH, depth: int = settings.RATE_LIMIT_SKETCH_DEPTH):
+        self.width = width
+        self.depth = depth
+        self._sketches: Dict[str, SlidingWindowSketch] = {}
+
+    async def hit(self, rule: str, key: str, limit: int, window_seconds: int) -> Optional[int]:
+        sketch = self._sketches.get(rule)
+        if sketch is None or sketch.window_seconds != window_seconds:
+            sketch = self._sketches[rule] = SlidingWindowSketch(window_seconds, self.width, self.depth)
+        count, elapsed = sketch.hit(key, time.time())
+        if count <= limit:
+            return None
+        return max(1, math.ceil(window_seconds - elapsed))
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Shared counters: one INCR per hit on the current window's key, plus a GET of the previous one."""
+
+    def __init__(self, client=None, url: Optional[str] = settings.REDIS_URL, prefix: str = "ratelimit:"):
+        if client is None:
+            if not url:
+                raise ValueError("REDIS_URL must be set to use the redis rate limit backend")
+            from redis import asyncio as aioredis
+
+            client = aioredis.from_url(url)
+        self._client = client
+        self._prefix = prefix
+
+    async def hit(self, rule: str, key: str, limit: int, window_seconds: int) -> Optional[int]:
+        now = time.time()
+        start = int(now // window_seconds) * window_seconds
+        # Hashed so arbitrary user input never ends up in a key name
+        base = self._prefix + rule + ":" + hashlib.blake2b(key.encode(), digest_size=12).hexdigest() + ":"
+        async with self._client.pipeline(transaction=False) as pipe:
+            pipe.incr(base + str(start))
+            pipe.expire(base + str(start), 2 * window_seconds)
+            pipe.get(base + str(start - window_seconds))
+            current, _, previous = await pipe.execute()
+        count = _sliding_estimate(int(previous or 0), current, now - start, window_seconds)
+        if count <= limit:
+            return None
+        return max(1, math.ceil(start + window_seconds - now))
+
+    async def close(self):
+        await self._client.aclose()
+
+
+class RateLimiter:
+    def __init__(self, backend: RateLimitBackend, rules: Dict[str, Tuple[int, int]] = settings.RATE_LIMITS):
+        self.backend = backend
+        self.rules = rules
+
+    async def hit(self, rule: str, key: Optional[str]):
+        """Counts a hit of ``key`` against ``rule`` (limit, window seconds), raising RateLimitExceeded past the limit."""
+        if not key or rule not in self.rules:
+            return
+        limit, window_seconds = self.rules[rule]
+        retry_after = await self.backend.hit(rule, key.lower(), limit, window_seconds)
+        if retry_after is not None:
+            raise RateLimitExceeded(retry_after)
+
+
+def create_rate_limiter(name: str = settings.RATE_LIMIT_BACKEND) -> RateLimiter:
+    backends = {
+        "memory": MemoryRateLimitBackend,
+        "redis": RedisRateLimitBackend,
+    }
+    if name not in backends:
+        raise ValueError("Unknown rate limit backend %r, expected one of %s" % (name, ", ".join(backends)))
+    return RateLimiter(backends[name]())
+
+
+rate_limiter = create_rate_limiter()
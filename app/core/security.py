@@ -1,13 +1,88 @@
+import time
+from typing import Optional, Tuple
+
 from passlib.context import CryptContext
 
 from app.core.config import settings
+from app.core.metrics import PHASE_BCRYPT, metrics, record_phase
+from app.core.worker_pool import BoundedWorkerPool
+
+
+def create_pwd_context() -> CryptContext:
+    # min_rounds makes hashes below the configured cost count as outdated
+    return CryptContext(
+        schemes=settings.PASSWORD_HASH_SCHEMES,
+        deprecated="auto",
+        bcrypt__rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+        bcrypt__min_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+        argon2__type="ID",
+        argon2__rounds=settings.PASSWORD_ARGON2_TIME_COST,
+        argon2__min_rounds=settings.PASSWORD_ARGON2_TIME_COST,
+        argon2__memory_cost=settings.PASSWORD_ARGON2_MEMORY_COST,
+        argon2__parallelism=settings.PASSWORD_ARGON2_PARALLELISM,
+    )
+
+
+pwd_context = create_pwd_context()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+password_hashing_pool = BoundedWorkerPool(
+    kind=settings.PASSWORD_HASH_POOL,
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_QUEUE_SIZE,
+    retry_after=settings.PASSWORD_HASH_RETRY_AFTER_SECONDS,
+    # Started lazily, by then the worker has threads running and must not fork
+    start_method="forkserver",
+)
+metrics.register_gauge(
+    "password_hash_queue_depth",
+    "Password hashing calls waiting for a worker.",
+    lambda: password_hashing_pool.metrics()["queue_depth"],
+)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    started = time.perf_counter()
+    try:
+        return await password_hashing_pool.run(verify_password, plain_password, hashed_password)
+    finally:
+        record_phase(PHASE_BCRYPT, time.perf_counter() - started)
+
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Returns whether the password matches, and a new hash when the stored one is outdated."""
+    started = time.perf_counter()
+    try:
+        return await password_hashing_pool.run(verify_and_update_password, plain_password, hashed_password)
+    finally:
+        record_phase(PHASE_BCRYPT, time.perf_counter() - started)
+
+
+_dummy_hash = None
+
+
+async def verify_dummy_password(plain_password: str):
+    # Costs the same as a real verify, so unknown usernames cannot be told apart by timing
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = await get_password_hash_async("dummy password")
+    await verify_password_async(plain_password, _dummy_hash)
+
+
+async def get_password_hash_async(password: str) -> str:
+    started = time.perf_counter()
+    try:
+        return await password_hashing_pool.run(get_password_hash, password)
+    finally:
+        record_phase(PHASE_BCRYPT, time.perf_counter() - started)
@@ -0,0 +1,27 @@
+import os
+
+from uvicorn_worker import UvicornWorker
+
+from app.core.config import settings
+
+
+class AppWorker(UvicornWorker):
+    """uvicorn worker for gunicorn.conf.py, pinned to uvloop and httptools."""
+
+    CONFIG_KWARGS = {
+        "loop": "uvloop",
+        "http": "httptools",
+        "lifespan": "on",
+        # In-flight requests get this long to finish before the lifespan shutdown runs
+        "timeout_graceful_shutdown": settings.WEB_GRACEFUL_TIMEOUT_SECONDS,
+        # request.client is the X-Forwarded-For client only when the peer is one of these
+        "forwarded_allow_ips": settings.TRUSTED_PROXIES,
+    }
+
+
+def default_workers() -> int:
+    # The CPUs this process may run on, which is what a container's cpuset limits
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except AttributeError:
+        return max(1, os.cpu_count() or 1)
@@ -0,0 +1,50 @@
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from app.core.config import settings
+
+
+class SessionStateCache:
+    """LRU cache of refresh token jti -> session active flag, with a TTL.
+
+    Writes from this process go through the cache, so only a deactivation
+    made by another worker can be missed, and only for up to ``ttl_seconds``.
+    """
+
+    def __init__(
+        self,
+        max_size: int = settings.SESSION_CACHE_SIZE,
+        ttl_seconds: float = settings.SESSION_CACHE_TTL_SECONDS,
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[bool, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, jti: str) -> Optional[bool]:
+        entry = self._entries.get(jti)
+        if entry is None:
+            return None
+        active, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[jti]
+            return None
+        self._entries.move_to_end(jti)
+        return active
+
+    def set(self, jti: str, active: bool):
+        if self.max_size <= 0:
+            return
+        self._entries[jti] = (active, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(jti)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def discard(self, jti: str):
+        self._entries.pop(jti, None)
+
+    def clear(self):
+        self._entries.clear()
@@ -0,0 +1,32 @@
+from collections import deque
+from typing import Dict, Iterable
+
+
+class LatencyWindow:
+    def __init__(self, size: int = 1024):
+        self._samples = deque(maxlen=size)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentiles(self, quantiles: Iterable[float] = (0.5, 0.95, 0.99)) -> Dict[str, float]:
+        samples = sorted(self._samples)
+        if not samples:
+            return {"p%g" % (q * 100): 0.0 for q in quantiles}
+        last = len(samples) - 1
+        return {"p%g" % (q * 100): samples[min(last, int(q * len(samples)))] for q in quantiles}
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "avg": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+            **self.percentiles(),
+        }
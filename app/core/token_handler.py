@@ -1,11 +1,16 @@
 import asyncio
-from datetime import datetime
+import logging
+import time
 from fastapi import Depends, HTTPException, status
 from fastapi_jwt_auth import AuthJWT
+from fastapi_jwt_auth.exceptions import RevokedTokenError
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Callable, Optional
 
+from app.core.claims_cache import ClaimsCache
 from app.core.config import settings
+from app.core.denylist_backend import create_denylist_backend
+from app.core.metrics import PHASE_DENYLIST, PHASE_JWT, timed_phase
 from app.schemas.token import JWTSettings
 from app.db.session import get_db
 from app.crud.user_session import crud_session
@@ -16,33 +21,51 @@ def get_config():
     return JWTSettings()
 
 
-denylist = []
+logger = logging.getLogger(__name__)
 
-def clean_up_exipred_access_tokens():
-    now = int(datetime.now().timestamp())
-    for item in denylist:
-        expired = item["exp"] < now
-        if expired:
-            denylist.remove(item)
+denylist_backend = create_denylist_backend()
+claims_cache = ClaimsCache()
+
+async def clean_up_exipred_access_tokens():
+    await denylist_backend.purge_expired()
 
 
 async def schedule_clean_up():
     while True:
-        clean_up_exipred_access_tokens()
-        await asyncio.sleep(settings.DENIED_TOKEN_CLEAN_UP_MINUTES)
+        try:
+            await clean_up_exipred_access_tokens()
+        except Exception:
+            logger.exception("Denylist clean up failed")
+        await asyncio.sleep(settings.DENIED_TOKEN_CLEAN_UP_MINUTES * 60)
+
+
+async def schedule_denylist_flush():
+    while True:
+        await asyncio.sleep(settings.DENYLIST_FLUSH_INTERVAL_SECONDS)
+        try:
+            await denylist_backend.flush()
+        except Exception:
+            # The batch stays queued for the next flush
+            logger.exception("Denylist flush failed")
 
 
 @AuthJWT.token_in_denylist_loader
 def check_if_token_in_denylist(decrypted_token):
-    jti = decrypted_token["jti"]
-    return any(d["jti"] == jti for d in denylist)
+    # The loader is synchronous, the shared store is consulted in verify_access_token
+    return denylist_backend.is_revoked_locally(decrypted_token["jti"]) or denylist_backend.is_subject_revoked_locally(
+        decrypted_token["sub"], decrypted_token["iat"]
+    )
 
 
 async def verify_active_refresh_token(Authorize: AuthJWT = Depends(), db: AsyncSession = Depends(get_db)) -> dict:
-    Authorize.jwt_refresh_token_required()
-    refresh_token = Authorize.get_raw_jwt()
+    with timed_phase(PHASE_JWT):
+        Authorize.jwt_refresh_token_required()
+        refresh_token = Authorize.get_raw_jwt()
 
-    active = crud_session.is_session_active(db, refresh_token["jti"])
+    with timed_phase(PHASE_DENYLIST):
+        # Covers a logout_all that this worker's session cache has not seen yet
+        revoked = await denylist_backend.is_subject_revoked(refresh_token["sub"], refresh_token["iat"])
+    active = False if revoked else await crud_session.is_session_active(db, refresh_token["jti"])
 
     if active:
         return refresh_token
@@ -58,13 +81,35 @@ async def verify_active_refresh_token(Authorize: AuthJWT = Depends(), db: AsyncS
         )
 
 
+def _cached_access_claims(Authorize: AuthJWT) -> Optional[dict]:
+    # The cached path skips the CSRF double submit check, so it is only taken when that is off
+    request = getattr(Authorize, "_request", None)
+    if request is None or Authorize._cookie_csrf_protect:
+        return None
+    token = request.cookies.get(Authorize._access_cookie_key)
+    return claims_cache.get(token) if token else None
+
+
 def get_verify_access_token_dependency(required: bool = True) -> Callable:
-    async def verify_access_token(Authorize: AuthJWT = Depends(), required=True) -> Optional[dict]:
-        if required:
-            Authorize.jwt_required()
-        else:
-            Authorize.jwt_optional()
-        access_token = Authorize.get_raw_jwt()
+    async def verify_access_token(Authorize: AuthJWT = Depends()) -> Optional[dict]:
+        with timed_phase(PHASE_JWT):
+            access_token = _cached_access_claims(Authorize)
+            if access_token is None:
+                if required:
+                    Authorize.jwt_required()
+                else:
+                    Authorize.jwt_optional()
+                access_token = Authorize.get_raw_jwt()
+                if access_token:
+                    claims_cache.set(Authorize._token, access_token)
+        if access_token:
+            with timed_phase(PHASE_DENYLIST):
+                revoked = await denylist_backend.is_revoked(access_token["jti"]) or await denylist_backend.is_subject_revoked(
+                    access_token["sub"], access_token["iat"]
+                )
+            if revoked:
+                claims_cache.discard_jti(access_token["jti"])
+                raise RevokedTokenError(status_code=401, message="Token has been revoked")
         return access_token
     
     return verify_access_token
@@ -74,6 +119,10 @@ async def invalidate_access_token(access_token: Optional[dict]):
     if access_token:
         jti = access_token["jti"]
         exp = access_token["exp"]
-        denylist.append({"jti": jti, "exp": exp})
+        claims_cache.discard_jti(jti)
+        await denylist_backend.revoke(jti, exp)
 
 
+async def invalidate_all_tokens(subject: str):
+    # Tokens issued earlier in the current second stay valid, a login racing the logout must not be revoked
+    await denylist_backend.revoke_subject(subject, int(time.time()))
@@ -0,0 +1,190 @@
+"""Bulk user import, shared by POST /api/v1/users/import and python -m app.commands.import_users.
+
+Input is NDJSON or CSV with a header row, one UserImport record per line,
+read as a stream. Records are handled in chunks of USER_IMPORT_CHUNK_SIZE:
+invalid ones and duplicates within the chunk are rejected, the rest are
+checked against existing usernames and emails with one query each, only the
+new ones get their plaintext password hashed on user_import_pool, and they
+are inserted in a single executemany and committed.
+
+After every chunk the importer reports an ImportProgress whose
+``checkpoint`` is the number of records fully handled. Passing it back as
+``start_at`` resumes the import; since existing users are skipped, resuming
+from an older checkpoint is safe too.
+"""
+import asyncio
+import csv
+import os
+import time
+from typing import AsyncIterator, Dict, List, Set, Tuple, Union
+
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.core.security import get_password_hash
+from app.core.worker_pool import BoundedWorkerPool
+from app.crud.user import crud_user
+from app.db.session import AsyncSessionLocal
+from app.schemas.user import UserImport
+
+FORMATS = ("ndjson", "csv")
+
+# Shared by every import in the process and shut down with the app. Its workers are
+# started by a fork server, never forked from a process that already runs threads.
+user_import_pool = BoundedWorkerPool(
+    kind="process",
+    max_workers=settings.USER_IMPORT_HASH_WORKERS or os.cpu_count() or 1,
+    max_queue=settings.USER_IMPORT_CHUNK_SIZE,
+    start_method="forkserver",
+)
+
+
+class ImportProgress:
+    def __init__(self, checkpoint: int = 0, max_errors: int = 100):
+        self.checkpoint = checkpoint
+        self.inserted = 0
+        self.existing = 0
+        self.rejected = 0
+        # The first max_errors rejections, by record number (0-based, header excluded)
+        self.errors: List[Dict] = []
+        self.max_errors = max_errors
+        self._started = time.monotonic()
+        self._started_at_checkpoint = checkpoint
+
+    def reject(self, record: int, error: str):
+        self.rejected += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"record": record, "error": error})
+
+    def as_dict(self) -> Dict:
+        elapsed = time.monotonic() - self._started
+        handled = self.checkpoint - self._started_at_checkpoint
+        return {
+            "checkpoint": self.checkpoint,
+            "inserted": self.inserted,
+            "existing": self.existing,
+            "rejected": self.rejected,
+            "records_per_second": round(handled / elapsed, 1) if elapsed else 0.0,
+        }
+
+
+async def read_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Splits a byte stream, such as a request body, into lines."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8")
+    if buffer:
+        yield buffer.decode("utf-8")
+
+
+async def read_file_lines(path: str) -> AsyncIterator[str]:
+    with open(path, encoding="utf-8", newline="") as f:
+        for line in f:
+            yield line
+
+
+class UserImporter:
+    def __init__(
+        self,
+        fmt: str = "ndjson",
+        chunk_size: int = settings.USER_IMPORT_CHUNK_SIZE,
+        pool: BoundedWorkerPool = user_import_pool,
+    ):
+        if fmt not in FORMATS:
+            raise ValueError("Unknown import format %r, expected one of %s" % (fmt, ", ".join(FORMATS)))
+        self.fmt = fmt
+        self.chunk_size = chunk_size
+        self.pool = pool
+
+    async def run(self, lines: AsyncIterator[str], start_at: int = 0) -> AsyncIterator[ImportProgress]:
+        progress = ImportProgress(start_at)
+        chunk: List[Tuple[int, Union[str, Dict]]] = []
+        async for number, raw in self._records(lines):
+            if number < start_at:
+                continue
+            chunk.append((number, raw))
+            if len(chunk) >= self.chunk_size:
+                await self._import_chunk(chunk, progress)
+                chunk = []
+                yield progress
+        if chunk:
+            await self._import_chunk(chunk, progress)
+            yield progress
+
+    async def _records(self, lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, Union[str, Dict]]]:
+        # Blank lines are not records, so record numbers do not depend on them
+        number = 0
+        header = None
+        async for line in lines:
+            line = line.rstrip("\r\n")
+            if not line.strip():
+                continue
+            if self.fmt == "ndjson":
+                yield number, line
+            elif header is None:
+                header = next(csv.reader([line]))
+                continue
+            else:
+                values = next(csv.reader([line]))
+                # Empty cells count as missing, so a CSV can mix password and password_hash columns
+                yield number, {key: value for key, value in zip(header, values) if value != ""}
+            number += 1
+
+    async def _import_chunk(self, chunk: List[Tuple[int, Union[str, Dict]]], progress: ImportProgress):
+        users: List[UserImport] = []
+        usernames: Set[str] = set()
+        emails: Set[str] = set()
+        for number, raw in chunk:
+            try:
+                user = UserImport.model_validate_json(raw) if isinstance(raw, str) else UserImport.model_validate(raw)
+            except ValidationError as exc:
+                progress.reject(number, _describe(exc))
+                continue
+            if user.username in usernames or user.email in emails:
+                progress.reject(number, "duplicate username or email in the input")
+                continue
+            usernames.add(user.username)
+            emails.add(user.email)
+            users.append(user)
+
+        async with AsyncSessionLocal() as db:
+            taken_usernames, taken_emails = await crud_user.existing_usernames_and_emails(db, usernames, emails)
+        new_users = [
+            user for user in users if user.username not in taken_usernames and user.email not in taken_emails
+        ]
+        progress.existing += len(users) - len(new_users)
+
+        # Only users that will actually be inserted pay for a hash
+        passwords = [user.password for user in new_users if user.password_hash is None]
+        hashes: List[str] = []
+        # A pool's worth at a time, so concurrent imports share the pool without overflowing its queue
+        for start in range(0, len(passwords), self.pool.max_workers):
+            batch = passwords[start : start + self.pool.max_workers]
+            hashes += await asyncio.gather(*(self.pool.run(get_password_hash, password) for password in batch))
+        hashes_iter = iter(hashes)
+        rows = [
+            {
+                "username": user.username,
+                "email": user.email,
+                "hashed_password": user.password_hash or next(hashes_iter),
+                "is_active": user.is_active,
+                "is_verified": user.is_verified,
+            }
+            for user in new_users
+        ]
+        async with AsyncSessionLocal() as db:
+            inserted = await crud_user.bulk_create_users(db, rows)
+        progress.inserted += len(inserted)
+        # Taken by someone else between the check and the insert
+        progress.existing += len(rows) - len(inserted)
+        progress.checkpoint = chunk[-1][0] + 1
+
+
+def _describe(exc: ValidationError) -> str:
+    # Location and message only: the input may be a password
+    return "; ".join(
+        "%s: %s" % (".".join(str(part) for part in error["loc"]) or "record", error["msg"]) for error in exc.errors()
+    )
@@ -1,12 +1,116 @@
-import re
+import string
+from abc import ABC, abstractmethod
+from typing import Dict, List, NamedTuple, Optional, Sequence
 
-def validate_password(password: str) -> str:
-    pattern = re.compile(
-        r"^(?=.*[A-Z])(?=.*[a-z])(?=.*\d)(?=.*[!@#$%^&*(),.?\":{}|<>]).{8,}$"
-    )
-    if not pattern.match(password):
-        raise ValueError(
-            "Password must contain at least 1 uppercase letter, "
-            "1 lowercase letter, 1 number, and 1 special character."
+from app.core.breach_filter import BreachFilter
+from app.core.config import settings
+
+# Name -> (characters, how a failure message refers to it)
+CHARACTER_CLASSES: Dict[str, tuple] = {
+    "uppercase": (frozenset(string.ascii_uppercase), "1 uppercase letter"),
+    "lowercase": (frozenset(string.ascii_lowercase), "1 lowercase letter"),
+    "digit": (frozenset(string.digits), "1 number"),
+    "special": (frozenset('!@#$%^&*(),.?":{}|<>'), "1 special character"),
+}
+
+
+class PasswordRuleFailure(NamedTuple):
+    rule: str
+    message: str
+
+
+class PasswordPolicyError(ValueError):
+    def __init__(self, failures: List[PasswordRuleFailure]):
+        # A rule may report several failures under one message
+        messages = []
+        for failure in failures:
+            if failure.message not in messages:
+                messages.append(failure.message)
+        super().__init__(" ".join(messages))
+        self.failures = failures
+
+
+class PasswordRule(ABC):
+    @abstractmethod
+    def check(self, password: str) -> Sequence[PasswordRuleFailure]:
+        """Returns the failures, or an empty sequence when the password passes."""
+
+
+class LengthRule(PasswordRule):
+    def __init__(self, min_length: int):
+        self.min_length = min_length
+        self._failures = (PasswordRuleFailure("length", f"Password must be at least {min_length} characters long."),)
+
+    def check(self, password: str) -> Sequence[PasswordRuleFailure]:
+        return () if len(password) >= self.min_length else self._failures
+
+
+class CharacterClassRule(PasswordRule):
+    def __init__(self, required: Sequence[str]):
+        unknown = set(required) - set(CHARACTER_CLASSES)
+        if unknown:
+            raise ValueError("Unknown character classes %s, expected some of %s" % (sorted(unknown), ", ".join(CHARACTER_CLASSES)))
+        self._classes = [CHARACTER_CLASSES[name][0] for name in required]
+        # One prebuilt failure tuple per combination of missing classes, indexed by a bitmask
+        self._failures = []
+        for mask in range(1 << len(required)):
+            missing = [name for i, name in enumerate(required) if mask & (1 << i)]
+            message = "Password must contain at least " + ", ".join(CHARACTER_CLASSES[name][1] for name in missing) + "."
+            self._failures.append(tuple(PasswordRuleFailure(name, message) for name in missing))
+
+    def check(self, password: str) -> Sequence[PasswordRuleFailure]:
+        # isdisjoint walks the string in C and stops at the first character of the class
+        mask = bit = 0
+        for characters in self._classes:
+            if characters.isdisjoint(password):
+                mask |= 1 << bit
+            bit += 1
+        return self._failures[mask]
+
+
+class BreachedPasswordRule(PasswordRule):
+    def __init__(self, breach_filter: BreachFilter):
+        self.breach_filter = breach_filter
+        self._failures = (
+            PasswordRuleFailure("breached", "Password appears in a known data breach, please choose another one."),
         )
-    return password
+
+    def check(self, password: str) -> Sequence[PasswordRuleFailure]:
+        return self._failures if password in self.breach_filter else ()
+
+
+class PasswordPolicy:
+    def __init__(self, rules: Sequence[PasswordRule]):
+        self.rules = list(rules)
+
+    def check(self, password: str) -> List[PasswordRuleFailure]:
+        failures = []
+        for rule in self.rules:
+            failures.extend(rule.check(password))
+        return failures
+
+    def validate(self, password: str) -> str:
+        failures = self.check(password)
+        if failures:
+            raise PasswordPolicyError(failures)
+        return password
+
+
+def create_password_policy(
+    min_length: int = settings.PASSWORD_MIN_LENGTH,
+    required_classes: Sequence[str] = settings.PASSWORD_REQUIRED_CLASSES,
+    breach_filter_path: Optional[str] = settings.PASSWORD_BREACH_FILTER_PATH,
+) -> PasswordPolicy:
+    rules: List[PasswordRule] = [LengthRule(min_length)]
+    if required_classes:
+        rules.append(CharacterClassRule(required_classes))
+    if breach_filter_path:
+        rules.append(BreachedPasswordRule(BreachFilter(breach_filter_path)))
+    return PasswordPolicy(rules)
+
+
+password_policy = create_password_policy()
+
+
+def validate_password(password: str) -> str:
+    return password_policy.validate(password)
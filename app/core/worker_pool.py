@@ -0,0 +1,96 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from app.core.stats import LatencyWindow
+
+
+class PoolSaturatedError(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__("Worker pool is saturated")
+        self.retry_after = retry_after
+
+
+class BoundedWorkerPool:
+    """Runs blocking calls off the event loop with a hard cap on queued work.
+
+    Submissions beyond ``max_workers + max_queue`` outstanding calls are
+    rejected with PoolSaturatedError instead of piling up behind the workers.
+    A process pool starts its workers with ``start_method`` ("spawn" or
+    "forkserver" are safe once the caller has threads running).
+    """
+
+    def __init__(
+        self,
+        kind: str = "thread",
+        max_workers: int = 4,
+        max_queue: int = 64,
+        retry_after: int = 1,
+        start_method: Optional[str] = None,
+    ):
+        if kind not in ("thread", "process"):
+            raise ValueError("Unknown pool kind %r, expected 'thread' or 'process'" % kind)
+        self.kind = kind
+        self.start_method = start_method
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._executor: Optional[Executor] = None
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait = LatencyWindow()
+        self._run = LatencyWindow()
+
+    async def run(self, fn: Callable, *args):
+        if self._in_flight >= self.max_workers + self.max_queue:
+            self._rejected += 1
+            raise PoolSaturatedError(self.retry_after)
+
+        self._in_flight += 1
+        submitted_at = time.monotonic()
+        try:
+            started_at, result = await asyncio.get_running_loop().run_in_executor(
+                self._get_executor(), _timed_call, fn, args
+            )
+        finally:
+            self._in_flight -= 1
+        finished_at = time.monotonic()
+        self._completed += 1
+        self._wait.record(max(0.0, started_at - submitted_at))
+        self._run.record(finished_at - started_at)
+        return result
+
+    def metrics(self) -> Dict:
+        return {
+            "kind": self.kind,
+            "workers": self.max_workers,
+            "queue_capacity": self.max_queue,
+            "in_flight": self._in_flight,
+            "queue_depth": max(0, self._in_flight - self.max_workers),
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "wait_seconds": self._wait.snapshot(),
+            "run_seconds": self._run.snapshot(),
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                context = multiprocessing.get_context(self.start_method) if self.start_method else None
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="worker-pool")
+        return self._executor
+
+
+def _timed_call(fn: Callable, args: tuple):
+    # Module level so it can be pickled into a process pool worker
+    return time.monotonic(), fn(*args)
@@ -0,0 +1,28 @@
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud import statements
+from app.crud.user import crud_user
+from app.models.email_verification_token import EmailVerificationToken
+from app.models.user import User
+
+
+class CRUDEmailVerificationToken:
+    async def get_token_by_token(self, db: AsyncSession, token: str):
+        result = await db.execute(statements.email_verification_token_by_token, {"token": token})
+        return result.scalars().first()
+
+    async def verify(self, db: AsyncSession, token: EmailVerificationToken):
+        token.used = True
+        db.add(token)
+        await db.execute(
+            update(User)
+            .where(User.id == token.user_id)
+            .values(is_verified=True)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        await crud_user.invalidate_identity(token.user_id)
+
+
+crud_email_verification_token = CRUDEmailVerificationToken()
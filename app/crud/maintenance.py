@@ -0,0 +1,110 @@
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from sqlalchemy import and_, delete, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.config import settings
+from app.models.email_verification_token import EmailVerificationToken
+from app.models.maintenance_lease import MaintenanceLease
+from app.models.outbox_message import OutboxMessage
+from app.models.password_reset_token import PasswordResetToken
+from app.models.user_session import UserSession
+
+
+def _expired_sessions(now: datetime):
+    retention_cutoff = now - timedelta(hours=settings.MAINTENANCE_RETENTION_HOURS)
+    return or_(
+        # The refresh JWT minted with this session is past its exp (JWTSettings.authjwt_refresh_token_expires),
+        # so /access_token would reject it before ever looking at the row
+        UserSession.created_at < now - timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        and_(UserSession.active.is_(False), UserSession.updated_at < retention_cutoff),
+    )
+
+
+def _expired_tokens(model):
+    def condition(now: datetime):
+        retention_cutoff = now - timedelta(hours=settings.MAINTENANCE_RETENTION_HOURS)
+        return or_(
+            model.expires_at < retention_cutoff,
+            and_(model.used.is_(True), model.created_at < retention_cutoff),
+        )
+
+    return condition
+
+
+def _finished_outbox_messages(now: datetime):
+    retention_cutoff = now - timedelta(hours=settings.MAINTENANCE_RETENTION_HOURS)
+    return and_(OutboxMessage.status != "pending", OutboxMessage.created_at < retention_cutoff)
+
+
+SWEEPS = {
+    "user_sessions": (UserSession, _expired_sessions),
+    "password_reset_tokens": (PasswordResetToken, _expired_tokens(PasswordResetToken)),
+    "email_verification_tokens": (EmailVerificationToken, _expired_tokens(EmailVerificationToken)),
+    "outbox_messages": (OutboxMessage, _finished_outbox_messages),
+}
+
+
+class CRUDMaintenance:
+    async def delete_expired_batch(self, db: AsyncSession, sweep: str, after_id: int, batch_size: int) -> List[int]:
+        # Keyset pagination on the primary key: each batch starts where the last one stopped. The sweep
+        # conditions themselves are unindexed and filtered along that id range, which stays short because
+        # ids follow created_at and expired rows are the oldest
+        model, condition = SWEEPS[sweep]
+        batch = (
+            select(model.id)
+            .where(model.id > after_id, condition(datetime.now()))
+            .order_by(model.id)
+            .limit(batch_size)
+        )
+        stmt = (
+            delete(model)
+            .where(model.id.in_(batch.scalar_subquery()))
+            .returning(model.id)
+            .execution_options(synchronize_session=False)
+        )
+        result = await db.execute(stmt)
+        deleted = result.scalars().all()
+        await db.commit()
+        return deleted
+
+    async def acquire_lease(self, db: AsyncSession, name: str, owner: str, ttl_seconds: int) -> bool:
+        now = int(time.time())
+        stmt = (
+            update(MaintenanceLease)
+            .where(
+                MaintenanceLease.name == name,
+                or_(MaintenanceLease.owner == owner, MaintenanceLease.expires_at < now),
+            )
+            .values(owner=owner, expires_at=now + ttl_seconds)
+            .execution_options(synchronize_session=False)
+        )
+        result = await db.execute(stmt)
+        if result.rowcount:
+            await db.commit()
+            return True
+        try:
+            db.add(MaintenanceLease(name=name, owner=owner, expires_at=now + ttl_seconds))
+            await db.commit()
+        except IntegrityError:
+            # Someone else holds it
+            await db.rollback()
+            return False
+        return True
+
+    async def release_lease(self, db: AsyncSession, name: str, owner: str):
+        stmt = (
+            update(MaintenanceLease)
+            .where(MaintenanceLease.name == name, MaintenanceLease.owner == owner)
+            .values(expires_at=0)
+            .execution_options(synchronize_session=False)
+        )
+        await db.execute(stmt)
+        await db.commit()
+
+
+crud_maintenance = CRUDMaintenance()
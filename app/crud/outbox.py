@@ -0,0 +1,67 @@
+import time
+from typing import List
+
+from sqlalchemy import func, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.models.outbox_message import OutboxMessage
+
+
+class CRUDOutbox:
+    def add(self, db: AsyncSession, kind: str, recipient: str, subject: str, body: str) -> OutboxMessage:
+        # Not committed here: the message belongs to the caller's transaction
+        message = OutboxMessage(kind=kind, recipient=recipient, subject=subject, body=body)
+        db.add(message)
+        return message
+
+    async def claim_batch(self, db: AsyncSession, limit: int, claim_seconds: int) -> List[OutboxMessage]:
+        """Returns due messages and pushes their next attempt back, so no other dispatcher picks them up."""
+        now = int(time.time())
+        stmt = (
+            select(OutboxMessage)
+            .where(OutboxMessage.status == "pending", OutboxMessage.next_attempt_at <= now)
+            .order_by(OutboxMessage.next_attempt_at, OutboxMessage.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        messages = (await db.execute(stmt)).scalars().all()
+        if messages:
+            await db.execute(
+                update(OutboxMessage)
+                .where(OutboxMessage.id.in_([message.id for message in messages]))
+                .values(next_attempt_at=now + claim_seconds)
+                .execution_options(synchronize_session=False)
+            )
+        await db.commit()
+        return messages
+
+    async def mark_sent(self, db: AsyncSession, ids: List[int]):
+        if not ids:
+            return
+        stmt = (
+            update(OutboxMessage)
+            .where(OutboxMessage.id.in_(ids))
+            .values(status="sent", sent_at=func.now(), last_error=None)
+            .execution_options(synchronize_session=False)
+        )
+        await db.execute(stmt)
+        await db.commit()
+
+    async def mark_failed(self, db: AsyncSession, message_id: int, error: str, retry_at: int, dead: bool):
+        stmt = (
+            update(OutboxMessage)
+            .where(OutboxMessage.id == message_id)
+            .values(
+                status="dead" if dead else "pending",
+                attempts=OutboxMessage.attempts + 1,
+                next_attempt_at=retry_at,
+                last_error=error[:500],
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await db.execute(stmt)
+        await db.commit()
+
+
+crud_outbox = CRUDOutbox()
@@ -0,0 +1,71 @@
+"""Prebuilt statements for the queries on the request path.
+
+Each is built once with bound parameters and executed with a parameter
+dict. Reusing the same statement object skips rebuilding it, recomputing
+its cache key and redoing the ORM's compile state on every call; the SQL
+string is identical every time, so asyncpg's per-connection prepared
+statement cache (DB_STATEMENT_CACHE_SIZE) is hit as well.
+
+Profile reads (GET /users/me) and the email lookup of a password reset
+request are marked read_replica, so RoutingSession may serve them from a
+replica when DATABASE_REPLICA_URLS is set. Reads that decide access
+(credentials, sessions, tokens, the identity and superuser checks) stay on
+the primary: with replica lag, a revoked session or a used token would still
+look valid there. So do the duplicate checks before a write, which a lagging
+replica would pass.
+"""
+import ulid
+from sqlalchemy import bindparam, union_all, update
+from sqlalchemy.future import select
+
+from app.models.email_verification_token import EmailVerificationToken
+from app.models.password_reset_token import PasswordResetToken
+from app.models.user import User
+from app.models.user_session import UserSession
+
+user_by_id = select(User).where(User.id == bindparam("user_id")).execution_options(read_replica=True)
+user_by_username = select(User).where(User.username == bindparam("username"))
+user_by_email = select(User).where(User.email == bindparam("email")).execution_options(read_replica=True)
+# Two equality lookups instead of an OR, so each side can use its unique index
+user_by_username_or_email = select(User).from_statement(
+    union_all(
+        select(User).where(User.username == bindparam("username")),
+        select(User).where(User.email == bindparam("email")),
+    ).limit(1)
+)
+
+# Never the password hash, which the identity cache must not hold
+user_identity_columns = (User.id, User.username, User.is_active, User.is_verified, User.password_version)
+identity_by_username = select(*user_identity_columns).where(User.username == bindparam("username"))
+identity_by_id = select(*user_identity_columns).where(User.id == bindparam("user_id"))
+password_hash_by_id = select(User.hashed_password, User.password_version).where(User.id == bindparam("user_id"))
+
+session_by_refresh_token = select(UserSession).where(UserSession.refresh_token == bindparam("jti"))
+session_active_by_refresh_token = select(UserSession.active).where(UserSession.refresh_token == bindparam("jti"))
+deactivate_session = (
+    update(UserSession)
+    .where(UserSession.refresh_token == bindparam("jti"))
+    .values(active=False)
+    .execution_options(synchronize_session=False)
+)
+
+password_reset_token_by_token = select(PasswordResetToken).where(PasswordResetToken.token == bindparam("token"))
+email_verification_token_by_token = select(EmailVerificationToken).where(
+    EmailVerificationToken.token == bindparam("token")
+)
+
+# Run by the warm-up at startup, with parameters that match nothing
+_NO_USER = ulid.ULID(bytes(16))
+WARM_UP = [
+    (user_by_id, {"user_id": _NO_USER}),
+    (user_by_username, {"username": ""}),
+    (user_by_email, {"email": ""}),
+    (user_by_username_or_email, {"username": "", "email": ""}),
+    (identity_by_username, {"username": ""}),
+    (identity_by_id, {"user_id": _NO_USER}),
+    (password_hash_by_id, {"user_id": _NO_USER}),
+    (session_by_refresh_token, {"jti": ""}),
+    (session_active_by_refresh_token, {"jti": ""}),
+    (password_reset_token_by_token, {"token": ""}),
+    (email_verification_token_by_token, {"token": ""}),
+]
@@ -1,83 +1,232 @@
+import asyncio
+import logging
 import ulid
 import uuid
 
-from sqlalchemy import or_, update
+from datetime import datetime, timedelta
+from sqlalchemy import delete, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from typing import Collection, Dict, List, Optional, Set, Tuple
 
-from app.core.security import get_password_hash, verify_password
+from app.core.config import settings
+from app.core.identity_cache import IdentityCache, UserIdentity
+from app.core.notifications import queue_email_verification_email, queue_password_reset_email
+from app.core.security import get_password_hash_async, verify_and_update_password_async, verify_dummy_password
+from app.crud import statements
+from app.db.dml import insert_ignoring_duplicates
+from app.db.session import AsyncSessionLocal
+from app.models.email_verification_token import EmailVerificationToken
 from app.models.password_reset_token import PasswordResetToken
 from app.models.user import User
 from app.schemas.user import UserCreate
 
+logger = logging.getLogger(__name__)
+
 
 class CRUDUser:
-    async def get_user(self, db: AsyncSession, user_id: str):
-        result = await db.execute(select(User).filter(User.id == user_id))
+    def __init__(self, identities: Optional[IdentityCache] = None):
+        self.identities = identities if identities is not None else IdentityCache()
+        self._upgrades: Set[asyncio.Task] = set()
+
+    async def get_user(self, db: AsyncSession, user_id: ulid.ULID, *options):
+        """``options`` opt in to loading relationships, e.g. selectinload(User.sessions)."""
+        statement = statements.user_by_id.options(*options) if options else statements.user_by_id
+        result = await db.execute(statement, {"user_id": user_id})
         return result.scalars().first()
 
     async def get_user_by_email(self, db: AsyncSession, email: str):
-        result = await db.execute(select(User).filter(User.email == email))
+        result = await db.execute(statements.user_by_email, {"email": email})
         return result.scalars().first()
 
     async def get_user_by_username(self, db: AsyncSession, username: str):
-        result = await db.execute(select(User).filter(User.username == username))
+        result = await db.execute(statements.user_by_username, {"username": username})
         return result.scalars().first()
 
     async def get_user_by_username_or_email(
         self, db: AsyncSession, username: str, email: str
     ):
-        result = await db.execute(
-            select(User).filter(
-                or_(User.username.like(username), User.email.like(email))
-            )
-        )
+        result = await db.execute(statements.user_by_username_or_email, {"username": username, "email": email})
         return result.scalars().first()
 
+    async def get_identity_by_username(self, db: AsyncSession, username: str) -> Optional[UserIdentity]:
+        identity = self.identities.get_by_username(username)
+        if identity is None:
+            version = self.identities.version
+            result = await db.execute(statements.identity_by_username, {"username": username})
+            identity = self._remember_identity(result.first(), version)
+        return identity
+
+    async def get_identity(self, db: AsyncSession, user_id: ulid.ULID) -> Optional[UserIdentity]:
+        identity = self.identities.get_by_id(user_id)
+        if identity is None:
+            version = self.identities.version
+            result = await db.execute(statements.identity_by_id, {"user_id": user_id})
+            identity = self._remember_identity(result.first(), version)
+        return identity
+
+    def _remember_identity(self, row, version: int) -> Optional[UserIdentity]:
+        if row is None:
+            return None
+        identity = UserIdentity(*row)
+        self.identities.set(identity, version)
+        return identity
+
+    async def get_password_hash(self, db: AsyncSession, identity: UserIdentity) -> Optional[str]:
+        """The user's current hash, or None if the password has changed since ``identity`` was read."""
+        # Always from the primary and never cached
+        result = await db.execute(statements.password_hash_by_id, {"user_id": identity.id})
+        row = result.first()
+        if row is None:
+            return None
+        hashed_password, password_version = row
+        if password_version != identity.password_version:
+            # A cached identity whose invalidation never reached this worker
+            self.identities.discard(identity.id, identity.username)
+            return None
+        return hashed_password
+
+    async def invalidate_identity(self, user_id: Optional[ulid.ULID] = None, username: Optional[str] = None):
+        """Call after committing any change to a user's username, flags or password."""
+        await self.identities.invalidate(user_id, username)
+
     async def create_user(self, db: AsyncSession, user_in: UserCreate):
-        hashed_password = get_password_hash(user_in.password)
+        hashed_password = await get_password_hash_async(user_in.password)
         db_user = User(
             username=user_in.username,
             email=user_in.email,
             hashed_password=hashed_password,
         )
+        verification_token = EmailVerificationToken(
+            token=str(uuid.uuid4()),
+            expires_at=datetime.now() + timedelta(hours=settings.EMAIL_VERIFICATION_TOKEN_EXPIRE_HOURS),
+        )
+        db_user.email_verification_tokens.append(verification_token)
         db.add(db_user)
+        queue_email_verification_email(db, db_user.email, verification_token.token)
         await db.commit()
         await db.refresh(db_user)
         return db_user
 
+    async def existing_usernames_and_emails(
+        self, db: AsyncSession, usernames: Collection[str], emails: Collection[str]
+    ) -> Tuple[Set[str], Set[str]]:
+        """Which of ``usernames`` and ``emails`` are taken, in one indexed IN query each."""
+        taken_usernames = (await db.execute(select(User.username).where(User.username.in_(usernames)))).scalars()
+        taken_emails = (await db.execute(select(User.email).where(User.email.in_(emails)))).scalars()
+        return set(taken_usernames), set(taken_emails)
+
+    async def bulk_create_users(self, db: AsyncSession, rows: List[Dict]) -> Set[str]:
+        """Inserts ``rows`` (username, email, hashed_password, is_active, is_verified) in one executemany.
+
+        Rows clashing with an existing username or email are skipped rather
+        than failing the batch; returns the usernames actually inserted.
+        """
+        if not rows:
+            return set()
+        result = await db.execute(insert_ignoring_duplicates(db, User).returning(User.username), rows)
+        inserted = set(result.scalars())
+        await db.commit()
+        return inserted
+
     async def authenticate(self, db: AsyncSession, username: str, password: str):
         user = await self.get_user_by_username_or_email(
             db, username=username, email=username
         )
+        return await self.check_password(user, password)
+
+    async def check_password(self, user: Optional[User], password: str) -> Optional[User]:
+        """Verifies ``password`` for an already looked-up user, taking as long when there is none."""
         if not user:
+            await verify_dummy_password(password)
             return None
-        if not verify_password(password, user.hashed_password):
+        valid, new_hash = await verify_and_update_password_async(password, user.hashed_password)
+        if not valid:
             return None
+        if new_hash is not None:
+            # Off the login path, which has already paid for the new hash
+            task = asyncio.create_task(self._upgrade_password_hash(user.id, user.hashed_password, new_hash))
+            self._upgrades.add(task)
+            task.add_done_callback(self._upgrades.discard)
         return user
+
+    async def _upgrade_password_hash(self, user_id, old_hash: str, new_hash: str):
+        # Only replaces the hash that was verified, never a password changed in the meantime
+        stmt = (
+            update(User)
+            .where(User.id == user_id, User.hashed_password == old_hash)
+            .values(hashed_password=new_hash)
+            .execution_options(synchronize_session=False)
+        )
+        # Same password, so password_version and any cached identity stay as they are
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(stmt)
+                await db.commit()
+        except Exception:
+            logger.exception("Password hash upgrade failed", extra={"user_id": str(user_id)})
     
-    async def create_password_reset_token(self, db: AsyncSession, user_id: str):
+    async def create_password_reset_token(self, db: AsyncSession, user_id: ulid.ULID, email: Optional[str] = None):
         db_token = PasswordResetToken(
-            user_id = ulid.from_str(user_id),
+            user_id = user_id,
             token = str(uuid.uuid4()),
         )
         db.add(db_token)
+        if email is not None:
+            # Same transaction as the token: the email is sent if and only if the token exists
+            queue_password_reset_email(db, email, db_token.token)
         await db.commit()
         await db.refresh(db_token)
         return db_token
 
 
-    async def update_password(self, db: AsyncSession, user_id: str, password: str):
-        hashed_password = get_password_hash(password)
+    async def update_password(
+        self, db: AsyncSession, user_id: ulid.ULID, password: str, password_version: Optional[int] = None
+    ):
+        """With ``password_version``, only replaces that version of the password and returns None otherwise."""
+        hashed_password = await get_password_hash_async(password)
+        conditions = [User.id == user_id]
+        if password_version is not None:
+            conditions.append(User.password_version == password_version)
         stmt = (
             update(User)
-            .where(User.id == ulid.from_str(user_id))
-            .values(hashed_password=hashed_password)
+            .where(*conditions)
+            .values(hashed_password=hashed_password, password_version=User.password_version + 1)
             .returning(User)
         )
-        db_user = await db.execute(stmt)
+        db_user = (await db.execute(stmt)).scalars().first()
         await db.commit()
-        return db_user.scalars().first()
+        if db_user is not None:
+            await self.invalidate_identity(db_user.id, db_user.username)
+        return db_user
+
+    async def delete_user(self, db: AsyncSession, user_id: ulid.ULID) -> bool:
+        # A bulk delete: sessions, tokens and MFA rows go with ON DELETE CASCADE, none are loaded
+        stmt = (
+            delete(User)
+            .where(User.id == user_id)
+            .returning(User.username)
+            .execution_options(synchronize_session=False)
+        )
+        username = (await db.execute(stmt)).scalar()
+        await db.commit()
+        if username is None:
+            return False
+        await self.invalidate_identity(user_id, username)
+        return True
+
+    async def set_active(self, db: AsyncSession, user_id: ulid.ULID, is_active: bool):
+        stmt = (
+            update(User)
+            .where(User.id == user_id)
+            .values(is_active=is_active)
+            .returning(User)
+        )
+        db_user = (await db.execute(stmt)).scalars().first()
+        await db.commit()
+        if db_user is not None:
+            await self.invalidate_identity(db_user.id, db_user.username)
+        return db_user
 
 
 crud_user = CRUDUser()
@@ -1,66 +1,79 @@
-import ulid
 from fastapi import HTTPException, status
-from sqlalchemy import update
+from sqlalchemy import insert, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from typing import Optional
 
+from app.core.session_cache import SessionStateCache
+from app.crud import statements
 from app.models.user import User
 from app.models.user_session import UserSession
 from app.schemas.user_session import SessionCreate
 
 
 class CRUDUserSession:
+    def __init__(self, cache: Optional[SessionStateCache] = None):
+        self.cache = cache if cache is not None else SessionStateCache()
+
     async def get_session(self, db: AsyncSession, session_id: int):
         raise NotImplementedError()
     
     async def get_session_by_token(self, db: AsyncSession, refresh_token: str) -> Optional[UserSession]:
-        result = await db.execute(select(UserSession).filter(UserSession.refresh_token == refresh_token))
+        result = await db.execute(statements.session_by_refresh_token, {"jti": refresh_token})
         return result.scalars().first()
 
     async def create_session(self, db: AsyncSession, session_data: SessionCreate):
-        session = UserSession(
-            user_id=ulid.from_str(session_data.user_id),
-            refresh_token=session_data.refresh_token,
-            ip_address=session_data.ip_address,
-            user_agent=session_data.user_agent,
+        stmt = (
+            insert(UserSession)
+            .values(
+                user_id=session_data.user_id,
+                refresh_token=session_data.refresh_token,
+                ip_address=session_data.ip_address,
+                user_agent=session_data.user_agent,
+            )
+            .returning(UserSession)
         )
-
-        db.add(session)
+        result = await db.execute(stmt)
+        session = result.scalar_one()
         await db.commit()
-        await db.refresh(session)
+        self.cache.set(session.refresh_token, session.active)
         return session
     
     async def deactivate_session(self, db: AsyncSession, refresh_token: str):
-        session = await self.get_session_by_token(db, refresh_token)
-        if not session:
+        result = await db.execute(statements.deactivate_session, {"jti": refresh_token})
+        if not result.rowcount:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Session not found in crud"
             )
-        session.active = False
-        db.add(session)
         await db.commit()
-        await db.refresh(session)
+        self.cache.set(refresh_token, False)
 
     async def deactivate_all_sessions(self, db: AsyncSession, username: str):
+        user_id = select(User.id).where(User.username == username).scalar_subquery()
         stmt = (
             update(UserSession)
-            .where(UserSession.user_id == User.id, User.username == username)
+            .where(UserSession.user_id == user_id, UserSession.active == True)  # noqa: E712
             .values(active=False)
-            .returning(UserSession)
+            .returning(UserSession.refresh_token)
+            .execution_options(synchronize_session=False)
         )
-        await db.execute(stmt)
+        refresh_tokens = (await db.execute(stmt)).scalars().all()
         await db.commit()
+        for refresh_token in refresh_tokens:
+            self.cache.set(refresh_token, False)
 
     async def is_session_active(self, db: AsyncSession, jti: str) -> Optional[bool]:
-        session = await self.get_session_by_token(db, jti)
-        
-        if not session:
-            return None
-        
-        return session.active
-        
+        active = self.cache.get(jti)
+        if active is not None:
+            return active
+
+        result = await db.execute(statements.session_active_by_refresh_token, {"jti": jti})
+        active = result.scalar()
+        if active is not None:
+            self.cache.set(jti, active)
+        return active
+
 
 
 crud_session = CRUDUserSession()
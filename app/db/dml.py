@@ -0,0 +1,16 @@
+from typing import List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def insert_ignoring_duplicates(db: AsyncSession, model, index_elements: Optional[List[str]] = None):
+    """INSERT that skips rows clashing with a unique constraint, in the dialect of ``db``'s bind."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return insert(model).prefix_with("IGNORE", dialect="mysql")
+    return dialect_insert(model).on_conflict_do_nothing(index_elements=index_elements)
@@ -0,0 +1,177 @@
+import asyncio
+import itertools
+import logging
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Statements carrying this execution option may be served by a replica
+READ_REPLICA = "read_replica"
+
+
+class PinState:
+    """Whether the current request must read from the primary, and whether it has written."""
+
+    def __init__(self, pinned: bool = False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+pin_state_var: ContextVar[Optional[PinState]] = ContextVar("pin_state", default=None)
+
+
+class ReplicaPool:
+    """Replica engines with periodic health checks and round-robin or least-connections balancing."""
+
+    def __init__(
+        self,
+        engines: List[AsyncEngine],
+        balancing: str = settings.DB_REPLICA_BALANCING,
+        health_check_seconds: float = settings.DB_REPLICA_HEALTH_CHECK_SECONDS,
+        health_check_timeout_seconds: float = settings.DB_REPLICA_HEALTH_CHECK_TIMEOUT_SECONDS,
+    ):
+        if balancing not in ("round_robin", "least_connections"):
+            raise ValueError("Unknown replica balancing %r, expected 'round_robin' or 'least_connections'" % balancing)
+        self.engines = engines
+        self.balancing = balancing
+        self.health_check_seconds = health_check_seconds
+        self.health_check_timeout_seconds = health_check_timeout_seconds
+        # Assumed healthy until a check says otherwise, so reads spread out from the first request
+        self._healthy = list(engines)
+        self._counter = itertools.count()
+
+    def choose(self):
+        """Returns the sync engine of the replica to read from, or None when none is healthy."""
+        healthy = self._healthy
+        if not healthy:
+            return None
+        if self.balancing == "least_connections":
+            engine = min(healthy, key=lambda e: e.pool.checkedout())
+        else:
+            engine = healthy[next(self._counter) % len(healthy)]
+        return engine.sync_engine
+
+    async def check(self):
+        results = await asyncio.gather(*(self._ping(engine) for engine in self.engines))
+        healthy = [engine for engine, ok in zip(self.engines, results) if ok]
+        for engine in self.engines:
+            was, now = engine in self._healthy, engine in healthy
+            if was != now:
+                log = logger.info if now else logger.warning
+                log("Read replica is %s" % ("back" if now else "down"), extra={"replica": _name(engine)})
+        self._healthy = healthy
+
+    async def run_health_checks(self):
+        while True:
+            await self.check()
+            await asyncio.sleep(self.health_check_seconds)
+
+    async def _ping(self, engine: AsyncEngine) -> bool:
+        try:
+            async with engine.connect() as conn:
+                await asyncio.wait_for(conn.exec_driver_sql("SELECT 1"), self.health_check_timeout_seconds)
+            return True
+        except Exception:
+            return False
+
+    def metrics(self) -> List[Dict]:
+        return [
+            {"replica": _name(engine), "healthy": engine in self._healthy, "checked_out": engine.pool.checkedout()}
+            for engine in self.engines
+        ]
+
+    async def dispose(self):
+        for engine in self.engines:
+            await engine.dispose()
+
+
+def _name(engine: AsyncEngine) -> str:
+    return engine.url.render_as_string(hide_password=True)
+
+
+class RoutingSession(Session):
+    """Sends statements marked with the read_replica execution option to a replica.
+
+    Everything else goes to the primary, and so does every read after this
+    session has written or when the request is pinned (see
+    ReplicaPinningMiddleware), so a client always reads its own writes.
+    """
+
+    replicas: Optional[ReplicaPool] = None
+
+    def get_bind(self, mapper=None, *, clause=None, **kw):
+        if self._flushing or isinstance(clause, UpdateBase):
+            self._wrote()
+        elif (
+            self.replicas is not None
+            and clause is not None
+            and clause.get_execution_options().get(READ_REPLICA)
+            and not self.info.get("wrote")
+        ):
+            state = pin_state_var.get()
+            if state is None or not state.pinned:
+                replica = self.replicas.choose()
+                if replica is not None:
+                    return replica
+        return super().get_bind(mapper, clause=clause, **kw)
+
+    def _wrote(self):
+        self.info["wrote"] = True
+        state = pin_state_var.get()
+        if state is not None:
+            state.wrote = True
+
+
+class ReplicaPinningMiddleware:
+    """Keeps a client on the primary for a few seconds after a request of theirs has written.
+
+    The deadline travels in a cookie, so it holds whichever worker serves the
+    next request. Replicas only lag by the replication delay, well within the
+    SESSION_CACHE_TTL_SECONDS other workers already take to notice a logout.
+    """
+
+    cookie = "db_pin_until"
+
+    def __init__(self, app, pin_seconds: float = settings.DB_REPLICA_PIN_SECONDS):
+        self.app = app
+        self.pin_seconds = pin_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        state = PinState(pinned=self._pinned_until(scope) > time.time())
+
+        async def send_with_pin(message):
+            if message["type"] == "http.response.start" and state.wrote:
+                until = int(time.time() + self.pin_seconds) + 1
+                cookie = f"{self.cookie}={until}; Max-Age={int(self.pin_seconds) + 1}; Path=/; HttpOnly; SameSite=Lax"
+                message["headers"] = [*message.get("headers", ()), (b"set-cookie", cookie.encode("latin-1"))]
+            await send(message)
+
+        token = pin_state_var.set(state)
+        try:
+            await self.app(scope, receive, send_with_pin)
+        finally:
+            pin_state_var.reset(token)
+
+    def _pinned_until(self, scope) -> float:
+        for name, value in scope["headers"]:
+            if name == b"cookie":
+                for part in value.decode("latin-1").split(";"):
+                    key, _, until = part.strip().partition("=")
+                    if key == self.cookie:
+                        try:
+                            return float(until)
+                        except ValueError:
+                            return 0.0
+        return 0.0
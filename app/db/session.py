@@ -1,14 +1,139 @@
+import asyncio
+import logging
+import time
+from contextlib import AsyncExitStack
+from typing import Dict, List, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.core.config import settings
+from app.core.metrics import PHASE_DB, metrics, record_phase
+from app.core.stats import LatencyWindow
+from app.db.routing import READ_REPLICA, ReplicaPool, RoutingSession
+
+logger = logging.getLogger(__name__)
+pool_wait_times = LatencyWindow()
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_wait_times.record(time.perf_counter() - started)
+
+
+# SQLAlchemy names a pool's logger after its class, which puts this one under app.* rather than
+# sqlalchemy.pool; without this its INFO lines ("Pool disposed", "Pool recreating") reach the app logs
+logging.getLogger(f"{__name__}.{TimedQueuePool.__name__}").setLevel(logging.WARNING)
+
+
+def engine_options(database_url: str) -> Dict:
+    options = {
+        "future": True,
+        "poolclass": TimedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if make_url(database_url).get_driver_name() == "asyncpg":
+        options["connect_args"] = {"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+    return options
+
+
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+def _stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+    record_phase(PHASE_DB, time.perf_counter() - context._query_started)
+
+
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # SQLite ignores foreign keys, and with them ON DELETE CASCADE, unless enabled per connection
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def create_engine(database_url: str):
+    new_engine = create_async_engine(database_url, **engine_options(database_url))
+    event.listen(new_engine.sync_engine, "before_cursor_execute", _start_query_timer)
+    event.listen(new_engine.sync_engine, "after_cursor_execute", _stop_query_timer)
+    if new_engine.dialect.name == "sqlite":
+        event.listen(new_engine.sync_engine, "connect", _enable_sqlite_foreign_keys)
+    return new_engine
+
+
+engine = create_engine(settings.DATABASE_URL)
+metrics.register_gauge("db_pool_checked_out", "Database connections in use.", lambda: engine.pool.checkedout())
+
+replica_pool = None
+if settings.DATABASE_REPLICA_URLS:
+    replica_pool = ReplicaPool([create_engine(url) for url in settings.DATABASE_REPLICA_URLS])
+
+
+class AppSession(RoutingSession):
+    replicas = replica_pool
+
 
-engine = create_async_engine(settings.DATABASE_URL, future=True, echo=True)
 AsyncSessionLocal = sessionmaker(
-    bind=engine, class_=AsyncSession, expire_on_commit=False
+    bind=engine, class_=AsyncSession, sync_session_class=AppSession, expire_on_commit=False
 )
 
 
+async def warm_up_database(db_engine, queries: List[Tuple], connections: int = settings.DB_POOL_SIZE):
+    """Opens ``connections`` pooled connections and runs every (statement, parameters) of ``queries`` on each.
+
+    The statements land in the engine's compiled cache and, on asyncpg, are
+    prepared on every connection the first requests will get.
+    """
+
+    async def run_queries(conn):
+        # A plain session on the connection, so nothing is routed elsewhere
+        async with AsyncSession(bind=conn) as db:
+            for statement, parameters in queries:
+                await db.execute(statement, parameters)
+
+    async with AsyncExitStack() as stack:
+        conns = await asyncio.gather(*(stack.enter_async_context(db_engine.connect()) for _ in range(connections)))
+        await asyncio.gather(*(run_queries(conn) for conn in conns))
+
+
+async def warm_up_replicas(queries: List[Tuple]):
+    # Reads fall back to the primary, so a replica that is down does not hold up readiness
+    queries = [(statement, params) for statement, params in queries if statement.get_execution_options().get(READ_REPLICA)]
+    results = await asyncio.gather(
+        *(warm_up_database(replica, queries) for replica in replica_pool.engines), return_exceptions=True
+    )
+    for replica, result in zip(replica_pool.engines, results):
+        if isinstance(result, Exception):
+            logger.warning(
+                "Read replica warm-up failed: %s" % result,
+                extra={"replica": replica.url.render_as_string(hide_password=True)},
+            )
+
+
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
+
+
+def pool_metrics() -> Dict:
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(0, pool.overflow()),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "wait_seconds": pool_wait_times.snapshot(),
+        "replicas": replica_pool.metrics() if replica_pool is not None else [],
+    }
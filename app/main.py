@@ -1,22 +1,70 @@
-import asyncio
+import logging
 from contextlib import asynccontextmanager
 
 from fastapi import BackgroundTasks, FastAPI, Request
 from fastapi.responses import JSONResponse
 from fastapi_jwt_auth.exceptions import AuthJWTException
 
-from app.core.token_handler import schedule_clean_up
-from app.api.v1.endpoints import auth, health, users
+from app.core.config import settings
+from app.core.log import RequestIdMiddleware, setup_logging
+from app.core.maintenance import MaintenanceScheduler
+from app.core.lifecycle import lifecycle
+from app.core.metrics import MetricsMiddleware
+from app.core.notifications import OutboxDispatcher
+from app.core.rate_limit import RateLimitExceeded, rate_limiter
+from app.core.security import password_hashing_pool, verify_dummy_password
+from app.core.worker_pool import PoolSaturatedError
+from app.crud import statements
+from app.crud.user import crud_user
+from app.core.token_handler import denylist_backend, schedule_clean_up, schedule_denylist_flush
+from app.core.user_import import user_import_pool
+from app.db.routing import ReplicaPinningMiddleware
+from app.db.session import engine, replica_pool, warm_up_database, warm_up_replicas
+from app.api.v1.endpoints import auth, health, metrics, users
 
 
+logger = logging.getLogger(__name__)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    asyncio.create_task(schedule_clean_up())
+    log_listener = setup_logging()
+    log_listener.start()
+    lifecycle.add_closer("database", engine.dispose)
+    lifecycle.add_closer("password hashing", password_hashing_pool.shutdown)
+    lifecycle.add_closer("user import hashing", user_import_pool.shutdown)
+    lifecycle.add_closer("rate limiter", rate_limiter.backend.close)
+    lifecycle.add_closer("denylist", denylist_backend.close)
+    lifecycle.add_closer("identity cache", crud_user.identities.close)
+
+    lifecycle.add_job("denylist clean up", schedule_clean_up())
+    lifecycle.add_job("denylist flush", schedule_denylist_flush())
+    if settings.MAINTENANCE_ENABLED:
+        lifecycle.add_job("maintenance", MaintenanceScheduler().run_forever())
+    if settings.SMTP_HOST:
+        lifecycle.add_job("outbox dispatcher", OutboxDispatcher().run_forever())
+    else:
+        logger.warning("SMTP_HOST is not set, outgoing emails stay queued in the outbox")
+    lifecycle.add_job("identity cache listener", crud_user.identities.listen())
+    if replica_pool is not None:
+        lifecycle.add_closer("read replicas", replica_pool.dispose)
+        lifecycle.add_job("replica health checks", replica_pool.run_health_checks())
+
+    lifecycle.add_warm_up("database", lambda: warm_up_database(engine, statements.WARM_UP))
+    if replica_pool is not None:
+        lifecycle.add_warm_up("read replicas", lambda: warm_up_replicas(statements.WARM_UP))
+    lifecycle.add_warm_up("password hashing", lambda: verify_dummy_password("warm-up"))
+    await lifecycle.start()
+    # uvicorn stops accepting and lets in-flight requests finish before resuming here
     yield
-    print("After")
+    await lifecycle.shutdown()
+    logger.info("Shutdown complete")
+    log_listener.stop()
 
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(ReplicaPinningMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(RequestIdMiddleware)
 
 
 @app.exception_handler(AuthJWTException)
@@ -24,6 +72,25 @@ def authjwt_exception_handler(request: Request, exc: AuthJWTException):
     return JSONResponse(status_code=exc.status_code, content={"detail": exc.message})
 
 
+@app.exception_handler(PoolSaturatedError)
+def pool_saturated_exception_handler(request: Request, exc: PoolSaturatedError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy, please retry later"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.exception_handler(RateLimitExceeded)
+def rate_limit_exception_handler(request: Request, exc: RateLimitExceeded):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Too many requests, please retry later"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["auth"])
 app.include_router(users.router, prefix="/api/v1/users", tags=["users"])
 app.include_router(health.router, prefix="/api/v1", tags=["health"])
+app.include_router(metrics.router)
@@ -1,24 +1,61 @@
+import uuid
+
 import ulid
-from sqlalchemy.types import CHAR, TypeDecorator
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.types import BINARY, TypeDecorator
+
+_CROCKFORD = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+# Crockford's base32 alphabet to the digits int(..., 32) understands, so strings decode in C.
+# The letters int() would accept but Crockford leaves out are deleted, which fails the length check.
+_TO_INT_DIGITS = str.maketrans(_CROCKFORD + _CROCKFORD.lower(), "0123456789abcdefghijklmnopqrstuv" * 2, "IiLlOoUu")
+
+
+def ulid_bytes_from_str(value: str) -> bytes:
+    # isascii/isalnum rule out the signs, underscores, whitespace and non-ASCII digits int() also takes
+    if len(value) == 26 and value.isascii() and value.isalnum():
+        digits = value.translate(_TO_INT_DIGITS)
+        if len(digits) == 26 and digits[0] <= "7":
+            return int(digits, 32).to_bytes(16, "big")
+    raise ValueError("value %s is not a valid ULID string" % value)
 
 
 class ULIDType(TypeDecorator):
-    impl = CHAR
+    """A ULID stored in 16 bytes: a native UUID on PostgreSQL, BINARY(16) elsewhere.
 
-    def __init__(self):
-        super().__init__(26)
+    Binds accept ulid.ULID or its string form, results are ulid.ULID.
+    """
+
+    impl = BINARY(16)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(postgresql.UUID())
+        return dialect.type_descriptor(BINARY(16))
 
     def process_bind_param(self, value, dialect):
         if value is None:
             return value
         if isinstance(value, ulid.ULID):
-            return str(value)
-        raise ValueError("value %s is not a valid ulid.ULID" % value)
+            raw = value.bytes
+        elif isinstance(value, str):
+            raw = ulid_bytes_from_str(value)
+        else:
+            raise ValueError("value %s is not a valid ulid.ULID" % value)
+        if dialect.name != "postgresql":
+            return raw
+        if dialect.driver == "asyncpg" and isinstance(value, ulid.ULID):
+            # asyncpg encodes any object with a 16 byte .bytes attribute as a uuid
+            return value
+        return uuid.UUID(bytes=raw)
 
     def process_result_value(self, value, dialect):
         if value is None:
             return value
-        return ulid.from_str(value)
+        if dialect.name == "postgresql":
+            value = value.bytes
+        # The database only holds valid 16 byte values, skip ulid.from_bytes' checks
+        return ulid.ULID(bytes(value))
 
     @staticmethod
     def create_ulid():
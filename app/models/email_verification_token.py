@@ -8,11 +8,11 @@ from app.models.custom_types import ULIDType
 class EmailVerificationToken(Base):
     __tablename__ = "email_verification_tokens"
 
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(ULIDType(), ForeignKey("users.id"), nullable=False)
+    id = Column(Integer, primary_key=True)
+    user_id = Column(ULIDType(), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     token = Column(String, unique=True, nullable=False)
     expires_at = Column(DateTime, nullable=False)
     created_at = Column(DateTime, default=func.now())
     used = Column(Boolean, default=False)
 
-    user = relationship("User", back_populates="email_verification_tokens")
+    user = relationship("User", back_populates="email_verification_tokens", lazy="raise")
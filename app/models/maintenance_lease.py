@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String
+
+from app.db.base import Base
+
+
+class MaintenanceLease(Base):
+    __tablename__ = "maintenance_leases"
+
+    name = Column(String, primary_key=True)
+    owner = Column(String, nullable=False)
+    expires_at = Column(Integer, nullable=False)
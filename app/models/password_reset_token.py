@@ -2,6 +2,7 @@ from datetime import datetime, timedelta
 from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, func
 from sqlalchemy.orm import relationship
 
+from app.core.config import settings
 from app.db.base import Base
 from app.models.custom_types import ULIDType
 
@@ -9,11 +10,13 @@ from app.models.custom_types import ULIDType
 class PasswordResetToken(Base):
     __tablename__ = "password_reset_tokens"
 
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(ULIDType(), ForeignKey("users.id"), nullable=False)
+    id = Column(Integer, primary_key=True)
+    user_id = Column(ULIDType(), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     token = Column(String, unique=True, nullable=False)
-    expires_at = Column(DateTime, default=datetime.now() + timedelta(days=1))
+    expires_at = Column(
+        DateTime, default=lambda: datetime.now() + timedelta(hours=settings.PASSWORD_RESET_TOKEN_EXPIRE_HOURS)
+    )
     created_at = Column(DateTime, default=func.now())
     used = Column(Boolean, default=False)
 
-    user = relationship("User", back_populates="password_reset_tokens")
+    user = relationship("User", back_populates="password_reset_tokens", lazy="raise")
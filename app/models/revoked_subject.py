@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, String
+
+from app.db.base import Base
+
+
+class RevokedSubject(Base):
+    """Every token for ``subject`` issued before ``issued_before`` is revoked."""
+
+    __tablename__ = "revoked_subjects"
+
+    subject = Column(String, primary_key=True)
+    issued_before = Column(Integer, nullable=False)
+    expires_at = Column(Integer, nullable=False, index=True)
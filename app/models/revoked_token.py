@@ -0,0 +1,11 @@
+from sqlalchemy import Column, DateTime, Integer, String, func
+
+from app.db.base import Base
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String, primary_key=True)
+    expires_at = Column(Integer, nullable=False, index=True)
+    created_at = Column(DateTime, default=func.now())
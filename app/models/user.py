@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, DateTime, String, func
+from sqlalchemy import Boolean, Column, DateTime, Integer, String, func
 from sqlalchemy.orm import relationship
 
 from app.db.base import Base
@@ -12,29 +12,45 @@ from app.models.user_session import UserSession
 class User(Base):
     __tablename__ = "users"
 
-    id = Column(
-        ULIDType(), default=lambda: ULIDType.create_ulid(), primary_key=True, index=True
-    )
+    id = Column(ULIDType(), default=lambda: ULIDType.create_ulid(), primary_key=True)
     username = Column(String, unique=True, index=True, nullable=False)
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
+    # Bumped whenever the password is set, so caches can tell it changed without holding the hash
+    password_version = Column(Integer, nullable=False, default=0, server_default="0")
     is_active = Column(Boolean, default=True)
     is_verified = Column(Boolean, default=False)
     is_superuser = Column(Boolean, default=False)
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
 
+    # Nothing is loaded implicitly: add selectinload(User.<collection>) to the query that needs one.
+    # Deleting a user leaves the children to ON DELETE CASCADE instead of loading them first.
     sessions = relationship(
-        UserSession.__name__, back_populates="user", cascade="all, delete-orphan"
+        UserSession.__name__,
+        back_populates="user",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="raise",
     )
     password_reset_tokens = relationship(
-        PasswordResetToken.__name__, back_populates="user", cascade="all, delete-orphan"
+        PasswordResetToken.__name__,
+        back_populates="user",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="raise",
     )
     email_verification_tokens = relationship(
         EmailVerificationToken.__name__,
         back_populates="user",
         cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="raise",
     )
     mfa = relationship(
-        MFA.__name__, back_populates="user", cascade="all, delete-orphan"
+        MFA.__name__,
+        back_populates="user",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="raise",
     )
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, func
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, String, func, text
 from sqlalchemy.orm import relationship
 
 from app.db.base import Base
@@ -7,9 +7,18 @@ from app.models.custom_types import ULIDType
 
 class UserSession(Base):
     __tablename__ = "user_sessions"
+    __table_args__ = (
+        # Only active sessions are ever looked up per user (logout_all)
+        Index(
+            "ix_user_sessions_user_id_active",
+            "user_id",
+            postgresql_where=text("active"),
+            sqlite_where=text("active = 1"),
+        ),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(ULIDType(), ForeignKey("users.id"), nullable=False)
+    id = Column(Integer, primary_key=True)
+    user_id = Column(ULIDType(), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     refresh_token = Column(String, nullable=False, unique=True)
     ip_address = Column(String(45))
     user_agent = Column(String)
@@ -17,4 +26,4 @@ class UserSession(Base):
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     active = Column(Boolean, default=True, nullable=False)
 
-    user = relationship("User", back_populates="sessions")
+    user = relationship("User", back_populates="sessions", lazy="raise")
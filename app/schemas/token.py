@@ -11,5 +11,5 @@ class JWTSettings(BaseModel):
     authjwt_cookie_csrf_protect: bool = False
     authjwt_denylist_enabled: bool = True
     authjwt_denylist_token_checks: set = {"access"}
-    access_expires: int = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    refresh_expires: int = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    authjwt_access_token_expires: timedelta = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    authjwt_refresh_token_expires: timedelta = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
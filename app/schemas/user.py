@@ -1,5 +1,8 @@
-from pydantic import BaseModel, EmailStr, Field, field_validator
+from typing import Optional
 
+from pydantic import BaseModel, EmailStr, Field, field_validator, model_validator
+
+from app.core.security import pwd_context
 from app.core.validators import validate_password
 
 
@@ -16,6 +19,31 @@ class UserCreate(UserBase):
         return validate_password(v)
 
 
+class UserImport(UserBase):
+    """One record of a bulk import: a plaintext password or a hash in one of PASSWORD_HASH_SCHEMES."""
+
+    password: Optional[str] = None
+    password_hash: Optional[str] = None
+    is_active: bool = True
+    is_verified: bool = False
+
+    @field_validator("password")
+    def validate_password(cls, v):
+        return validate_password(v) if v is not None else v
+
+    @field_validator("password_hash")
+    def validate_password_hash(cls, v):
+        if v is not None and pwd_context.identify(v) is None:
+            raise ValueError("password_hash is not in one of the configured PASSWORD_HASH_SCHEMES")
+        return v
+
+    @model_validator(mode="after")
+    def check_one_password(self):
+        if (self.password is None) == (self.password_hash is None):
+            raise ValueError("exactly one of password and password_hash is required")
+        return self
+
+
 class UserLogin(BaseModel):
     username: str = Field(min_length=4, max_length=32)
     password: str = Field(...)
@@ -42,3 +70,11 @@ class User(UserBase):
 class UserDetailed(User):
     id: str = Field(..., exclude=False)
     is_superuser: bool = Field(..., exclude=False)
+
+
+class UserActiveUpdate(BaseModel):
+    is_active: bool
+
+
+class EmailVerificationConfirm(BaseModel):
+    token: str
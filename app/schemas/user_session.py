@@ -1,9 +1,14 @@
-from pydantic import BaseModel, field_validator
-from ulid import from_str
+from typing import Union
+
+from pydantic import BaseModel, ConfigDict
+from ulid import ULID
 
 
 class SessionCreate(BaseModel):
-    user_id: str
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    # ULIDType binds either form, passing the ULID itself saves encoding it to a string
+    user_id: Union[ULID, str]
     refresh_token: str
     ip_address: str
     user_agent: str
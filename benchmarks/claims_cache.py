@@ -0,0 +1,62 @@
+"""Access token verification throughput with the claims cache on and off.
+
+Drives the verify_access_token dependency directly with a prepared request,
+so only JWT handling and the (local) denylist check are measured.
+
+    python -m benchmarks.claims_cache [--tokens 1000] [--calls 50000]
+"""
+import argparse
+import asyncio
+import time
+
+# Must come before any app import, it points the app at the benchmark database
+from benchmarks.common import summarize
+
+from fastapi_jwt_auth import AuthJWT
+from starlette.requests import Request
+
+from app.core.token_handler import claims_cache, get_verify_access_token_dependency
+
+
+def make_request(token: str) -> Request:
+    cookie = f"access_token_cookie={token}".encode()
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"cookie", cookie)], "query_string": b""}
+    return Request(scope)
+
+
+async def measure(requests, calls: int):
+    verify_access_token = get_verify_access_token_dependency()
+    latencies = []
+    started_all = time.perf_counter()
+    for i in range(calls):
+        request = requests[i % len(requests)]
+        started = time.perf_counter()
+        await verify_access_token(AuthJWT(req=request))
+        latencies.append(time.perf_counter() - started)
+    return summarize(latencies, time.perf_counter() - started_all)
+
+
+async def main(tokens: int, calls: int):
+    Authorize = AuthJWT()
+    requests = [make_request(Authorize.create_access_token(subject=f"user{i}")) for i in range(tokens)]
+    max_size = claims_cache.max_size
+
+    print(f"{tokens:,} distinct tokens, {calls:,} verifications per run")
+    print(f"{'cache':>6} {'verif/s':>10} {'p50':>11} {'p95':>11} {'p99':>11}")
+    for name, size in (("off", 0), ("on", max_size)):
+        claims_cache.clear()
+        claims_cache.max_size = size
+        await measure(requests, min(calls, 1000))
+        result = await measure(requests, calls)
+        print(
+            f"{name:>6} {result['rps']:>10.0f} "
+            + " ".join(f"{result[k] * 1e6:>8.1f} us" for k in ("p50", "p95", "p99"))
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, default=1_000)
+    parser.add_argument("--calls", type=int, default=50_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.tokens, args.calls))
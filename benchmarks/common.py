@@ -0,0 +1,74 @@
+"""Shared setup for the benchmark scripts.
+
+Importing this module points the app at a throwaway SQLite database unless
+DATABASE_URL is already set, so it must be imported before anything from
+``app``.
+"""
+import os
+import statistics
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, List
+
+DB_PATH = os.path.join(tempfile.gettempdir(), "fastapi_auth_api_bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{DB_PATH}")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+# Every request comes from one client, the login/register limits would cut the runs short
+os.environ.setdefault("RATE_LIMITS", "{}")
+
+
+def summarize(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    latencies = sorted(latencies)
+    count = len(latencies)
+    return {
+        "requests": count,
+        "rps": count / elapsed if elapsed else 0.0,
+        "mean": statistics.fmean(latencies) if latencies else 0.0,
+        "p50": latencies[int(count * 0.50)] if latencies else 0.0,
+        "p95": latencies[min(count - 1, int(count * 0.95))] if latencies else 0.0,
+        "p99": latencies[min(count - 1, int(count * 0.99))] if latencies else 0.0,
+    }
+
+
+def print_latency_header():
+    print(f"{'scenario':<26} {'n':>6} {'rps':>9} {'p50':>11} {'p95':>11} {'p99':>11}")
+
+
+def print_latency_row(name: str, result: Dict[str, float]):
+    print(
+        f"{name:<26} {result['requests']:>6} {result['rps']:>9.1f} "
+        + " ".join(f"{result[k] * 1e3:>8.2f} ms" for k in ("p50", "p95", "p99"))
+    )
+
+
+def time_per_call(fn: Callable, number: int) -> float:
+    started = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return (time.perf_counter() - started) / number
+
+
+async def reset_database():
+    from app.db.base import Base
+    from app.db.session import engine
+    import app.models.outbox_message  # noqa: F401
+    import app.models.revoked_subject  # noqa: F401
+    import app.models.revoked_token  # noqa: F401
+    import app.models.user  # noqa: F401
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+
+@asynccontextmanager
+async def app_client():
+    import httpx
+
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app, client=("127.0.0.1", 50000))
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            yield client
@@ -0,0 +1,70 @@
+"""Denylist lookup latency: legacy list scan vs. the hashed, heap-indexed store.
+
+Run from the repository root:
+
+    python -m benchmarks.denylist_lookup
+"""
+import random
+import time
+import uuid
+
+from app.core.denylist import Denylist
+
+SIZES = (1_000, 100_000, 1_000_000)
+STORE_LOOKUPS = 200_000
+LIST_LOOKUP_BUDGET_SECONDS = 2.0
+
+
+def build(size: int):
+    exp = int(time.time()) + 3600
+    jtis = [str(uuid.uuid4()) for _ in range(size)]
+    legacy = [{"jti": jti, "exp": exp} for jti in jtis]
+    store = Denylist()
+    for jti in jtis:
+        store.add(jti, exp)
+    return jtis, legacy, store
+
+
+def probes(jtis, count: int):
+    # Half revoked, half unknown: the hot path is dominated by "not revoked" checks
+    revoked = random.choices(jtis, k=count // 2)
+    unknown = [str(uuid.uuid4()) for _ in range(count - len(revoked))]
+    keys = revoked + unknown
+    random.shuffle(keys)
+    return keys
+
+
+def time_legacy(legacy, keys):
+    done = 0
+    start = time.perf_counter()
+    deadline = start + LIST_LOOKUP_BUDGET_SECONDS
+    for jti in keys:
+        any(d["jti"] == jti for d in legacy)
+        done += 1
+        if time.perf_counter() > deadline:
+            break
+    return (time.perf_counter() - start) / done, done
+
+
+def time_store(store, keys):
+    start = time.perf_counter()
+    for jti in keys:
+        jti in store
+    return (time.perf_counter() - start) / len(keys), len(keys)
+
+
+def main():
+    print(f"{'revoked':>10} {'list scan':>14} {'n':>7} {'hashed store':>14} {'n':>8} {'speedup':>10}")
+    for size in SIZES:
+        jtis, legacy, store = build(size)
+        keys = probes(jtis, STORE_LOOKUPS)
+        legacy_latency, legacy_n = time_legacy(legacy, keys)
+        store_latency, store_n = time_store(store, keys)
+        print(
+            f"{size:>10,} {legacy_latency * 1e6:>11.2f} us {legacy_n:>7} "
+            f"{store_latency * 1e6:>11.3f} us {store_n:>8} {legacy_latency / store_latency:>9.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
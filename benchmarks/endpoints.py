@@ -0,0 +1,195 @@
+"""Throughput and latency of the auth endpoints through an in-process ASGI client.
+
+    python -m benchmarks.endpoints [--requests 200] [--concurrency 16] [--only login logout]
+
+Each scenario prepares its own fixtures (users, sessions, reset tokens)
+directly through the data layer, so only the endpoint under test is timed.
+/register, /login and /password-reset/confirm are dominated by bcrypt by
+design.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+# Must come before any app import, it points the app at the benchmark database
+from benchmarks.common import app_client, print_latency_header, print_latency_row, reset_database, summarize
+
+from fastapi_jwt_auth import AuthJWT
+
+from app.core.security import get_password_hash
+from app.crud.user import crud_user
+from app.crud.user_session import crud_session
+from app.db.session import AsyncSessionLocal
+from app.models.user import User
+from app.schemas.user_session import SessionCreate
+
+PASSWORD = "Benchmark1!"
+
+
+class Fixtures:
+    def __init__(self):
+        self.Authorize = AuthJWT()
+        self.hashed_password = get_password_hash(PASSWORD)
+
+    async def user(self, username: str) -> User:
+        user = User(
+            username=username,
+            email=f"{username}@example.com",
+            hashed_password=self.hashed_password,
+            is_verified=True,
+        )
+        async with AsyncSessionLocal() as db:
+            db.add(user)
+            await db.commit()
+        return user
+
+    async def session_cookies(self, user: User, with_access_token: bool = True) -> str:
+        jti = str(uuid.uuid4())
+        refresh_token = self.Authorize.create_refresh_token(subject=user.username, user_claims={"jti": jti})
+        access_token = self.Authorize.create_access_token(subject=user.username)
+        async with AsyncSessionLocal() as db:
+            await crud_session.create_session(
+                db,
+                SessionCreate(user_id=user.id, refresh_token=jti, ip_address="127.0.0.1", user_agent="bench"),
+            )
+        if not with_access_token:
+            return f"refresh_token_cookie={refresh_token}"
+        return f"access_token_cookie={access_token}; refresh_token_cookie={refresh_token}"
+
+    async def reset_token(self, user: User) -> str:
+        async with AsyncSessionLocal() as db:
+            token = await crud_user.create_password_reset_token(db, user.id)
+            return token.token
+
+
+async def scenario_register(client, fixtures, n):
+    run = uuid.uuid4().hex[:6]
+
+    def request(i):
+        payload = {"username": f"r{run}{i}", "email": f"r{run}{i}@example.com", "password": PASSWORD}
+        return client.post("/api/v1/auth/register", json=payload)
+
+    return request, 200
+
+
+async def scenario_login(client, fixtures, n):
+    user = await fixtures.user(f"login{uuid.uuid4().hex[:8]}")
+
+    def request(i):
+        login = user.username if i % 2 else user.email
+        return client.post("/api/v1/auth/login", params={"username": login, "password": PASSWORD})
+
+    return request, 200
+
+
+async def scenario_access_token(client, fixtures, n):
+    user = await fixtures.user(f"refresh{uuid.uuid4().hex[:8]}")
+    # Without an access token: refreshing revokes the one presented, which would fail every later request
+    cookies = await fixtures.session_cookies(user, with_access_token=False)
+
+    def request(i):
+        return client.post("/api/v1/auth/access_token", headers={"Cookie": cookies})
+
+    return request, 200
+
+
+async def scenario_logout(client, fixtures, n):
+    user = await fixtures.user(f"logout{uuid.uuid4().hex[:8]}")
+    cookies = [await fixtures.session_cookies(user) for _ in range(n)]
+
+    def request(i):
+        return client.delete("/api/v1/auth/logout", headers={"Cookie": cookies[i]})
+
+    return request, 200
+
+
+async def scenario_logout_all(client, fixtures, n):
+    cookies = []
+    for _ in range(n):
+        user = await fixtures.user(f"all{uuid.uuid4().hex[:8]}")
+        for _ in range(4):
+            await fixtures.session_cookies(user)
+        cookies.append(await fixtures.session_cookies(user))
+
+    def request(i):
+        return client.delete("/api/v1/auth/logout_all", headers={"Cookie": cookies[i]})
+
+    return request, 200
+
+
+async def scenario_password_reset_request(client, fixtures, n):
+    user = await fixtures.user(f"reset{uuid.uuid4().hex[:8]}")
+
+    def request(i):
+        return client.post("/api/v1/auth/password-reset/request", json={"email": user.email})
+
+    return request, 200
+
+
+async def scenario_password_reset_confirm(client, fixtures, n):
+    user = await fixtures.user(f"confirm{uuid.uuid4().hex[:8]}")
+    tokens = [await fixtures.reset_token(user) for _ in range(n)]
+
+    def request(i):
+        payload = {"token": tokens[i], "new_password": PASSWORD, "should_logout": False}
+        return client.post("/api/v1/auth/password-reset/confirm", json=payload)
+
+    return request, 200
+
+
+SCENARIOS = {
+    "register": scenario_register,
+    "login": scenario_login,
+    "access_token": scenario_access_token,
+    "logout": scenario_logout,
+    "logout_all": scenario_logout_all,
+    "password_reset_request": scenario_password_reset_request,
+    "password_reset_confirm": scenario_password_reset_confirm,
+}
+
+
+async def run(client, request, expected_status, n, concurrency):
+    latencies = []
+    failures = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index, failures
+        while next_index < n:
+            i = next_index
+            next_index += 1
+            started = time.perf_counter()
+            response = await request(i)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != expected_status:
+                failures += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - started), failures
+
+
+async def main(requests, concurrency, only):
+    await reset_database()
+    fixtures = Fixtures()
+    print(f"{requests} requests per scenario, concurrency {concurrency}")
+    print_latency_header()
+    async with app_client() as client:
+        for name, prepare in SCENARIOS.items():
+            if only and name not in only:
+                continue
+            request, expected_status = await prepare(client, fixtures, requests)
+            result, failures = await run(client, request, expected_status, requests, concurrency)
+            print_latency_row(name, result)
+            if failures:
+                print(f"  {failures} responses did not return {expected_status}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--only", nargs="*", choices=sorted(SCENARIOS))
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.only))
@@ -0,0 +1,127 @@
+"""Login pipeline latency before and after the single-round-trip rework.
+
+Runs against a throwaway SQLite database. bcrypt is left out on purpose:
+both pipelines pay exactly one verify, and it would drown the difference.
+
+    python -m benchmarks.login_pipeline [--users 20000] [--logins 2000]
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+# Must come before any app import, it points the app at the benchmark database
+from benchmarks.common import reset_database, summarize
+
+import jwt
+from fastapi_jwt_auth import AuthJWT
+from sqlalchemy import event, insert, or_
+from sqlalchemy.future import select
+
+import app.core.token_handler  # noqa: F401  registers the AuthJWT config
+from app.core.config import settings
+from app.crud.user import crud_user
+from app.crud.user_session import crud_session
+from app.db.session import AsyncSessionLocal, engine
+from app.models.custom_types import ULIDType
+from app.models.user import User
+from app.models.user_session import UserSession
+from app.schemas.user_session import SessionCreate
+
+statements = 0
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def count_statement(*args):
+    global statements
+    statements += 1
+
+
+async def legacy_login(db, Authorize: AuthJWT, login: str):
+    result = await db.execute(select(User).filter(or_(User.username.like(login), User.email.like(login))))
+    user = result.scalars().first()
+    Authorize.create_access_token(subject=user.username)
+    refresh_token = Authorize.create_refresh_token(subject=user.username)
+    decoded_token = jwt.decode(refresh_token, settings.SECRET_KEY, algorithms=["HS256"])
+    session = UserSession(
+        user_id=user.id,
+        refresh_token=decoded_token["jti"],
+        ip_address="127.0.0.1",
+        user_agent="benchmark",
+    )
+    db.add(session)
+    await db.commit()
+    await db.refresh(session)
+
+
+async def current_login(db, Authorize: AuthJWT, login: str):
+    user = await crud_user.get_user_by_username_or_email(db, username=login, email=login)
+    refresh_jti = str(uuid.uuid4())
+    Authorize.create_access_token(subject=user.username)
+    Authorize.create_refresh_token(subject=user.username, user_claims={"jti": refresh_jti})
+    session_data = SessionCreate(
+        user_id=user.id,
+        refresh_token=refresh_jti,
+        ip_address="127.0.0.1",
+        user_agent="benchmark",
+    )
+    await crud_session.create_session(db, session_data)
+
+
+async def seed(users: int):
+    await reset_database()
+    async with engine.begin() as conn:
+        rows = [
+            {
+                "id": ULIDType.create_ulid(),
+                "username": f"user{i}",
+                "email": f"user{i}@example.com",
+                "hashed_password": "x",
+                "is_active": True,
+                "is_verified": True,
+            }
+            for i in range(users)
+        ]
+        await conn.execute(insert(User), rows)
+
+
+async def measure(pipeline, users: int, logins: int):
+    global statements
+    Authorize = AuthJWT()
+    latencies = []
+    statements = 0
+    started_all = time.perf_counter()
+    for i in range(logins):
+        login = f"user{(i * 7919) % users}"
+        if i % 2:
+            login += "@example.com"
+        started = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            await pipeline(db, Authorize, login)
+        latencies.append(time.perf_counter() - started)
+    result = summarize(latencies, time.perf_counter() - started_all)
+    result["statements"] = statements / logins
+    return result
+
+
+async def main(users: int, logins: int):
+    await seed(users)
+    print(f"{users:,} users, {logins:,} logins per pipeline (bcrypt excluded)")
+    print(f"{'pipeline':>10} {'mean':>10} {'p50':>10} {'p95':>10} {'p99':>10} {'stmts/login':>12}")
+    for name, pipeline in (("before", legacy_login), ("after", current_login)):
+        await measure(pipeline, users, min(logins, 100))
+        result = await measure(pipeline, users, logins)
+        print(
+            f"{name:>10} "
+            + " ".join(f"{result[k] * 1e3:>7.3f} ms" for k in ("mean", "p50", "p95", "p99"))
+            + f" {result['statements']:>12.1f}"
+        )
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--logins", type=int, default=2_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.logins))
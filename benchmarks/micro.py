@@ -0,0 +1,112 @@
+"""Micro-benchmarks for code that runs on every request.
+
+    python -m benchmarks.micro
+"""
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+
+# Must come before any app import, it points the app at the benchmark database
+from benchmarks.common import time_per_call
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.core.breach_filter import BreachFilter, password_digest, write_breach_filter
+from app.core.token_handler import denylist_backend
+from app.core.validators import BreachedPasswordRule, PasswordPolicy, validate_password
+from app.models.custom_types import ULIDType
+from app.models.user import User
+from app.schemas.password import PasswordChange
+from app.schemas.user import User as UserSchema, UserCreate
+
+REVOKED = 100_000
+BREACHED = 1_000_000
+
+
+def bench_denylist():
+    exp = int(time.time()) + 3600
+    revoked = [str(uuid.uuid4()) for _ in range(REVOKED)]
+
+    async def fill():
+        for jti in revoked:
+            await denylist_backend.revoke(jti, exp)
+
+    asyncio.run(fill())
+    hit = revoked[REVOKED // 2]
+    miss = str(uuid.uuid4())
+    loop = asyncio.new_event_loop()
+
+    def awaited_miss():
+        # Amortize the event loop round trip over many awaits
+        async def batch():
+            for _ in range(1000):
+                await denylist_backend.is_revoked(miss)
+
+        loop.run_until_complete(batch())
+
+    yield f"denylist local check, hit ({REVOKED:,} revoked)", lambda: denylist_backend.is_revoked_locally(hit), 500_000
+    yield f"denylist local check, miss ({REVOKED:,} revoked)", lambda: denylist_backend.is_revoked_locally(miss), 500_000
+    yield "await denylist_backend.is_revoked, miss", awaited_miss, 500, 1000
+
+
+def bench_ulid_type():
+    column_type = ULIDType()
+    value = ULIDType.create_ulid()
+    text = str(value)
+    for name, dialect in (("postgresql", postgresql.asyncpg.dialect()), ("sqlite", sqlite.aiosqlite.dialect())):
+        bind = column_type.bind_processor(dialect) or (lambda v: v)
+        result = column_type.result_processor(dialect, None) or (lambda v: v)
+        stored = bind(value)
+        yield f"ULIDType bind ({name})", lambda: bind(value), 200_000
+        yield f"ULIDType bind from str ({name})", lambda: bind(text), 200_000
+        yield f"ULIDType result ({name})", lambda: result(stored), 200_000
+
+
+def bench_validator():
+    yield "validate_password, valid", lambda: validate_password("Sup3r$ecret-passphrase"), 200_000
+
+    def invalid():
+        try:
+            validate_password("alllowercase")
+        except ValueError:
+            pass
+
+    yield "validate_password, invalid", invalid, 200_000
+
+    path = os.path.join(tempfile.mkdtemp(), "breached.bloom")
+    digests = (password_digest(f"breached{i}") for i in range(BREACHED))
+    write_breach_filter(path, digests, BREACHED, 0.001)
+    breach_policy = PasswordPolicy([BreachedPasswordRule(BreachFilter(path))])
+    yield f"breach filter check ({BREACHED // 1000}k entries)", lambda: breach_policy.validate("Sup3r$ecret-passphrase"), 200_000
+
+
+def bench_schemas():
+    payload = {"username": "benchmark", "email": "benchmark@example.com", "password": "Sup3r$ecret"}
+    orm_user = User(
+        id=ULIDType.create_ulid(),
+        username="benchmark",
+        email="benchmark@example.com",
+        hashed_password="x",
+        is_active=True,
+        is_verified=True,
+        is_superuser=False,
+    )
+    change = {"old_password": "Sup3r$ecret", "new_password": "Sup3r$ecret2", "should_logout": True}
+    yield "UserCreate(**payload)", lambda: UserCreate(**payload), 50_000
+    yield "User.model_validate(orm).model_dump()", lambda: UserSchema.model_validate(orm_user).model_dump(), 50_000
+    yield "PasswordChange(**payload)", lambda: PasswordChange(**change), 50_000
+
+
+def main():
+    print(f"{'benchmark':<48} {'per call':>12}")
+    for group in (bench_denylist, bench_ulid_type, bench_validator, bench_schemas):
+        for name, fn, number, *inner in group():
+            fn()
+            per_call = time_per_call(fn, number) / (inner[0] if inner else 1)
+            print(f"{name:<48} {per_call * 1e9:>9.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
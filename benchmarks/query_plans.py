@@ -0,0 +1,327 @@
+"""EXPLAIN every statement the CRUD classes in app/crud issue and fail on full table scans.
+
+    python -m benchmarks.query_plans
+
+Each public CRUD method is called once against the configured database
+(a throwaway SQLite one by default, see benchmarks.common). Every statement
+it sends is captured and explained, and the script exits non-zero if any plan
+scans one of LARGE_TABLES without an index, or if a CRUD method has no call
+registered below. LARGE_TABLES are first seeded with SEED_ROWS rows each and
+analyzed, so the planner weighs an index against a scan as it would in
+production. tests/test_query_plans.py runs the same check.
+"""
+import asyncio
+import inspect
+import json
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Tuple
+
+# Must come before any app import, it points the app at the benchmark database
+import benchmarks.common  # noqa: F401
+
+from sqlalchemy import event, func, insert
+from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
+
+from app.crud.email_verification_token import crud_email_verification_token
+from app.crud.maintenance import SWEEPS, crud_maintenance
+from app.crud.outbox import crud_outbox
+from app.crud.password_reset_token import crud_password_reset_token
+from app.crud.user import crud_user
+from app.crud.user_session import crud_session
+from app.db.base import Base
+from app.db.session import AsyncSessionLocal, engine
+from app.schemas.user import UserCreate
+from app.schemas.user_session import SessionCreate
+from app.models.custom_types import ULIDType
+from app.models.email_verification_token import EmailVerificationToken
+from app.models.outbox_message import OutboxMessage
+from app.models.password_reset_token import PasswordResetToken
+from app.models.revoked_subject import RevokedSubject
+from app.models.revoked_token import RevokedToken
+from app.models.user import User
+from app.models.user_session import UserSession
+import app.models.maintenance_lease  # noqa: F401
+import app.models.user  # noqa: F401
+
+LARGE_TABLES = {
+    "users",
+    "user_sessions",
+    "password_reset_tokens",
+    "email_verification_tokens",
+    "revoked_tokens",
+    "revoked_subjects",
+    "outbox_messages",
+}
+
+CRUDS = {
+    "crud_user": crud_user,
+    "crud_session": crud_session,
+    "crud_password_reset_token": crud_password_reset_token,
+    "crud_maintenance": crud_maintenance,
+    "crud_outbox": crud_outbox,
+    "crud_email_verification_token": crud_email_verification_token,
+}
+PASSWORD = "Benchmark1!"
+SEED_ROWS = 10000
+# Methods that issue no query
+SKIPPED = {"crud_session.get_session", "crud_user.check_password", "crud_user.invalidate_identity"}
+
+
+class Fixtures:
+    def __init__(self):
+        suffix = uuid.uuid4().hex[:8]
+        self.username = f"plan{suffix}"
+        self.email = f"plan{suffix}@example.com"
+        self.jti = str(uuid.uuid4())
+        self.user = None
+        self.identity = None
+        self.reset_token = None
+        self.verification_token = None
+        self.outbox_ids = []
+
+
+def calls(f: Fixtures) -> List[Tuple[str, Callable]]:
+    session_data = lambda jti: SessionCreate(  # noqa: E731
+        user_id=f.user.id, refresh_token=jti, ip_address="127.0.0.1", user_agent="plans"
+    )
+
+    async def create_user(db):
+        f.user = await crud_user.create_user(
+            db, UserCreate(username=f.username, email=f.email, password=PASSWORD)
+        )
+
+    async def create_password_reset_token(db):
+        f.reset_token = await crud_user.create_password_reset_token(db, f.user.id, email=f.email)
+
+    async def get_verification_token(db):
+        async with AsyncSessionLocal() as fixture_db:
+            token = (await fixture_db.execute(
+                select(EmailVerificationToken.token).filter(EmailVerificationToken.user_id == f.user.id)
+            )).scalar()
+        f.verification_token = await crud_email_verification_token.get_token_by_token(db, token)
+
+    async def claim_outbox_batch(db):
+        f.outbox_ids = [message.id for message in await crud_outbox.claim_batch(db, 10, 0)]
+
+    async def is_session_active(db):
+        crud_session.cache.clear()
+        await crud_session.is_session_active(db, f.jti)
+
+    async def get_identity_by_username(db):
+        crud_user.identities.clear()
+        await crud_user.get_identity_by_username(db, f.username)
+
+    async def get_identity(db):
+        crud_user.identities.clear()
+        f.identity = await crud_user.get_identity(db, f.user.id)
+
+    async def delete_expired_batches(db):
+        for sweep in SWEEPS:
+            await crud_maintenance.delete_expired_batch(db, sweep, 0, 100)
+
+    return [
+        ("crud_user.create_user", create_user),
+        # With a relationship opted in, so the selectin query is explained too
+        ("crud_user.get_user", lambda db: crud_user.get_user(db, f.user.id, selectinload(User.sessions))),
+        ("crud_user.get_user_by_email", lambda db: crud_user.get_user_by_email(db, f.email)),
+        ("crud_user.get_user_by_username", lambda db: crud_user.get_user_by_username(db, f.username)),
+        (
+            "crud_user.get_user_by_username_or_email",
+            lambda db: crud_user.get_user_by_username_or_email(db, f.username, f.username),
+        ),
+        ("crud_user.get_identity_by_username", get_identity_by_username),
+        ("crud_user.get_identity", get_identity),
+        ("crud_user.get_password_hash", lambda db: crud_user.get_password_hash(db, f.identity)),
+        ("crud_user.authenticate", lambda db: crud_user.authenticate(db, f.email, PASSWORD)),
+        ("crud_user.create_password_reset_token", create_password_reset_token),
+        (
+            "crud_user.update_password",
+            lambda db: crud_user.update_password(db, f.user.id, PASSWORD, f.identity.password_version),
+        ),
+        ("crud_user.set_active", lambda db: crud_user.set_active(db, f.user.id, True)),
+        ("crud_session.create_session", lambda db: crud_session.create_session(db, session_data(f.jti))),
+        ("crud_session.get_session_by_token", lambda db: crud_session.get_session_by_token(db, f.jti)),
+        ("crud_session.is_session_active", is_session_active),
+        ("crud_session.deactivate_session", lambda db: crud_session.deactivate_session(db, f.jti)),
+        ("crud_session.deactivate_all_sessions", lambda db: crud_session.deactivate_all_sessions(db, f.username)),
+        (
+            "crud_password_reset_token.get_token_by_token",
+            lambda db: crud_password_reset_token.get_token_by_token(db, f.reset_token.token),
+        ),
+        (
+            "crud_password_reset_token.invalidate_token",
+            lambda db: crud_password_reset_token.invalidate_token(db, f.reset_token),
+        ),
+        ("crud_email_verification_token.get_token_by_token", get_verification_token),
+        (
+            "crud_email_verification_token.verify",
+            lambda db: crud_email_verification_token.verify(db, f.verification_token),
+        ),
+        ("crud_outbox.claim_batch", claim_outbox_batch),
+        ("crud_outbox.mark_failed", lambda db: crud_outbox.mark_failed(db, f.outbox_ids[0], "error", 0, False)),
+        ("crud_outbox.mark_sent", lambda db: crud_outbox.mark_sent(db, f.outbox_ids)),
+        ("crud_maintenance.delete_expired_batch", delete_expired_batches),
+        ("crud_maintenance.acquire_lease", lambda db: crud_maintenance.acquire_lease(db, "plans", f.username, 1)),
+        ("crud_maintenance.release_lease", lambda db: crud_maintenance.release_lease(db, "plans", f.username)),
+        (
+            "crud_user.existing_usernames_and_emails",
+            lambda db: crud_user.existing_usernames_and_emails(db, [f.username], [f.email]),
+        ),
+        # Clashes with the fixture user, so nothing is inserted
+        (
+            "crud_user.bulk_create_users",
+            lambda db: crud_user.bulk_create_users(
+                db,
+                [
+                    {
+                        "username": f.username,
+                        "email": f.email,
+                        "hashed_password": f.user.hashed_password,
+                        "is_active": True,
+                        "is_verified": False,
+                    }
+                ],
+            ),
+        ),
+        # Last, everything above needs the user
+        ("crud_user.delete_user", lambda db: crud_user.delete_user(db, f.user.id)),
+    ]
+
+
+async def seed(rows: int = SEED_ROWS):
+    """Fills every one of LARGE_TABLES up to ``rows`` rows, none of them expired or due."""
+    async with AsyncSessionLocal() as db:
+        existing = (await db.execute(select(func.count()).select_from(User))).scalar()
+        if existing < rows:
+            now = int(time.time())
+            expires = datetime.now() + timedelta(days=1)
+            users = [
+                {
+                    "id": ULIDType.create_ulid(),
+                    "username": f"seed{i}",
+                    "email": f"seed{i}@example.com",
+                    "hashed_password": "x",
+                }
+                for i in range(existing, rows)
+            ]
+            tokens = [(user["id"], uuid.uuid4().hex) for user in users]
+            await db.execute(insert(User), users)
+            await db.execute(
+                insert(UserSession), [{"user_id": user_id, "refresh_token": token} for user_id, token in tokens]
+            )
+            await db.execute(
+                insert(PasswordResetToken),
+                [{"user_id": user_id, "token": token, "expires_at": expires} for user_id, token in tokens],
+            )
+            await db.execute(
+                insert(EmailVerificationToken),
+                [{"user_id": user_id, "token": token, "expires_at": expires} for user_id, token in tokens],
+            )
+            await db.execute(insert(RevokedToken), [{"jti": token, "expires_at": now + 86400} for _, token in tokens])
+            await db.execute(
+                insert(RevokedSubject),
+                [{"subject": user["username"], "issued_before": now, "expires_at": now + 86400} for user in users],
+            )
+            await db.execute(
+                insert(OutboxMessage),
+                [
+                    {"kind": "seed", "recipient": user["email"], "subject": "seed", "body": "seed", "status": "sent"}
+                    for user in users
+                ],
+            )
+            await db.commit()
+    async with engine.begin() as conn:
+        await conn.exec_driver_sql("ANALYZE")
+
+
+def crud_methods() -> List[str]:
+    return [
+        f"{name}.{method}"
+        for name, crud in CRUDS.items()
+        for method, fn in inspect.getmembers(crud, inspect.iscoroutinefunction)
+        if not method.startswith("_")
+    ]
+
+
+async def capture_statements(f: Fixtures) -> Dict[str, List[Tuple[str, tuple]]]:
+    captured: List[Tuple[str, tuple]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            captured.append((statement, parameters))
+
+    by_method = {}
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        for name, call in calls(f):
+            captured.clear()
+            async with AsyncSessionLocal() as db:
+                await call(db)
+            by_method[name] = list(captured)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+    return by_method
+
+
+async def full_scans(conn, statement: str, parameters) -> List[str]:
+    dialect = engine.dialect.name
+    if dialect == "postgresql":
+        result = await conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters)
+        plan = result.scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return [table for table in _pg_seq_scans(plan[0]["Plan"]) if table in LARGE_TABLES]
+    if dialect == "sqlite":
+        result = await conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+        scans = []
+        for row in result:
+            detail = row[-1]
+            if detail.startswith("SCAN ") and " USING " not in detail:
+                table = detail.split()[1]
+                if table in LARGE_TABLES:
+                    scans.append(table)
+        return scans
+    raise SystemExit(f"EXPLAIN parsing is not implemented for {dialect}")
+
+
+def _pg_seq_scans(node: dict):
+    if node.get("Node Type") == "Seq Scan":
+        yield node["Relation Name"]
+    for child in node.get("Plans", ()):
+        yield from _pg_seq_scans(child)
+
+
+async def check() -> List[str]:
+    """Runs the check and returns its failures, one line each."""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await seed()
+
+    by_method = await capture_statements(Fixtures())
+    failures = [f"{name}: no plan check registered" for name in crud_methods() if name not in by_method and name not in SKIPPED]
+
+    async with engine.connect() as conn:
+        for name, statements in by_method.items():
+            for statement, parameters in statements:
+                scans = await full_scans(conn, statement, parameters)
+                status = "FULL SCAN " + ", ".join(scans) if scans else "ok"
+                print(f"{status:<28} {name}: {' '.join(statement.split())[:100]}")
+                if scans:
+                    failures.append(f"{name}: full scan of {', '.join(scans)} in {' '.join(statement.split())}")
+    await engine.dispose()
+    return failures
+
+
+async def main() -> int:
+    failures = await check()
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
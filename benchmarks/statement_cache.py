@@ -0,0 +1,157 @@
+"""Per-query cost of building statements on every call versus the prebuilt ones in app.crud.statements.
+
+    python -m benchmarks.statement_cache [--calls 2000]
+
+Each hot query runs three ways against the benchmark database:
+
+- ``uncached``: built per call with the compiled cache off, which is what
+  every statement touching ULIDType got before it was marked cache_ok
+- ``built``: built per call, compiled once and then found in the cache
+- ``prebuilt``: the module-level statement executed with new parameters
+
+The ``compiles`` column counts the executions SQLAlchemy had to compile SQL
+for; the ``build`` column is the Python time spent constructing the statement
+and its cache key before it even reaches the cache.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+# Must come before any app import, it points the app at the benchmark database
+from benchmarks.common import reset_database, time_per_call
+
+from sqlalchemy import event, union_all
+from sqlalchemy.engine.default import CACHE_HIT
+from sqlalchemy.future import select
+
+from app.crud import statements
+from app.crud.user import crud_user
+from app.crud.user_session import crud_session
+from app.db.session import AsyncSessionLocal, engine
+from app.models.email_verification_token import EmailVerificationToken
+from app.models.password_reset_token import PasswordResetToken
+from app.models.user import User
+from app.models.user_session import UserSession
+from app.schemas.user import UserCreate
+from app.schemas.user_session import SessionCreate
+
+
+def queries(user, jti, reset_token, verification_token):
+    """(name, builds the statement the way the CRUD classes used to, prebuilt statement, its parameters)"""
+    return [
+        ("user by id", lambda: select(User).filter(User.id == user.id), statements.user_by_id, {"user_id": user.id}),
+        (
+            "user by username",
+            lambda: select(User).filter(User.username == user.username),
+            statements.user_by_username,
+            {"username": user.username},
+        ),
+        (
+            "user by email",
+            lambda: select(User).filter(User.email == user.email),
+            statements.user_by_email,
+            {"email": user.email},
+        ),
+        (
+            "user by username or email",
+            lambda: select(User).from_statement(
+                union_all(
+                    select(User).filter(User.username == user.username),
+                    select(User).filter(User.email == user.username),
+                ).limit(1)
+            ),
+            statements.user_by_username_or_email,
+            {"username": user.username, "email": user.username},
+        ),
+        (
+            "session by jti",
+            lambda: select(UserSession).filter(UserSession.refresh_token == jti),
+            statements.session_by_refresh_token,
+            {"jti": jti},
+        ),
+        (
+            "session active by jti",
+            lambda: select(UserSession.active).filter(UserSession.refresh_token == jti),
+            statements.session_active_by_refresh_token,
+            {"jti": jti},
+        ),
+        (
+            "reset token by token",
+            lambda: select(PasswordResetToken).filter(PasswordResetToken.token == reset_token),
+            statements.password_reset_token_by_token,
+            {"token": reset_token},
+        ),
+        (
+            "verification token by token",
+            lambda: select(EmailVerificationToken).filter(EmailVerificationToken.token == verification_token),
+            statements.email_verification_token_by_token,
+            {"token": verification_token},
+        ),
+    ]
+
+
+async def fixtures():
+    suffix = uuid.uuid4().hex[:8]
+    jti = str(uuid.uuid4())
+    async with AsyncSessionLocal() as db:
+        user = await crud_user.create_user(
+            db, UserCreate(username=f"stmt{suffix}", email=f"stmt{suffix}@example.com", password="Benchmark1!")
+        )
+        await crud_session.create_session(
+            db, SessionCreate(user_id=user.id, refresh_token=jti, ip_address="127.0.0.1", user_agent="bench")
+        )
+        reset_token = await crud_user.create_password_reset_token(db, user.id)
+        verification_token = (
+            await db.execute(select(EmailVerificationToken.token).filter(EmailVerificationToken.user_id == user.id))
+        ).scalar()
+    return user, jti, reset_token.token, verification_token
+
+
+async def measure(calls: int, make_call) -> tuple:
+    compiles = 0
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        nonlocal compiles
+        if context.cache_hit != CACHE_HIT:
+            compiles += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    try:
+        started = time.perf_counter()
+        for _ in range(calls):
+            (await make_call()).scalars().first()
+        elapsed = time.perf_counter() - started
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count)
+    return elapsed / calls, compiles
+
+
+async def main(calls: int):
+    await reset_database()
+    fixture = await fixtures()
+
+    print(f"{calls:,} executions per mode")
+    print(f"{'query':<30} {'mode':<9} {'per call':>11} {'build':>10} {'compiles':>9}")
+    uncached_engine = engine.execution_options(compiled_cache=None)
+    async with AsyncSessionLocal() as db, AsyncSessionLocal(bind=uncached_engine) as uncached_db:
+        for name, build, prebuilt, params in queries(*fixture):
+            build_cost = time_per_call(lambda: build()._generate_cache_key(), calls)
+            modes = (
+                ("uncached", lambda: uncached_db.execute(build()), build_cost),
+                ("built", lambda: db.execute(build()), build_cost),
+                ("prebuilt", lambda: db.execute(prebuilt, params), 0.0),
+            )
+            for mode, make_call, build_seconds in modes:
+                # Warm up, so "built" pays its one compile outside the measurement
+                await make_call()
+                per_call, compiles = await measure(calls, make_call)
+                print(f"{name:<30} {mode:<9} {per_call * 1e6:>8.1f} us {build_seconds * 1e6:>7.1f} us {compiles:>9}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=2_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.calls))
@@ -12,4 +12,9 @@ then
 fi
 
 # Start the FastAPI server
-exec uvicorn main:app --host 0.0.0.0 --port 8000 --reload
\ No newline at end of file
+if [ "$SERVER_MODE" = "development" ]
+then
+    exec uvicorn app.main:app --host 0.0.0.0 --port 8000 --reload
+else
+    exec gunicorn -c gunicorn.conf.py
+fi
\ No newline at end of file
@@ -0,0 +1,41 @@
+"""Production server: gunicorn -c gunicorn.conf.py
+
+The app is imported once in the master (preload_app), so SQLAlchemy models,
+pydantic schemas and passlib are loaded before the uvicorn workers are forked
+and shared with them copy-on-write. Each worker logs how long it took from
+being forked to being ready.
+"""
+import time
+
+from app.core.config import settings
+from app.core.server import default_workers
+
+MASTER_STARTED_AT = time.time()
+
+wsgi_app = "app.main:app"
+bind = settings.WEB_BIND
+workers = settings.WEB_CONCURRENCY or default_workers()
+worker_class = "app.core.server.AppWorker"
+preload_app = True
+keepalive = settings.WEB_KEEPALIVE_SECONDS
+forwarded_allow_ips = ",".join(settings.TRUSTED_PROXIES)
+# uvicorn drains for WEB_GRACEFUL_TIMEOUT_SECONDS, the rest is for the lifespan shutdown
+graceful_timeout = settings.WEB_GRACEFUL_TIMEOUT_SECONDS + 10
+timeout = 60
+
+
+def when_ready(server):
+    server.log.info("Master ready in %.2fs, starting %d workers", time.time() - MASTER_STARTED_AT, server.num_workers)
+
+
+def post_fork(server, worker):
+    from app.core.lifecycle import lifecycle
+    from app.db.session import engine, replica_pool
+
+    # The app was imported in the master, possibly long before a respawned worker is forked
+    lifecycle.started_at = time.time()
+    # The engines were created in the master; their pools must not be shared with the workers
+    engine.sync_engine.dispose(close=False)
+    if replica_pool is not None:
+        for replica in replica_pool.engines:
+            replica.sync_engine.dispose(close=False)
@@ -0,0 +1,7 @@
+import os
+import tempfile
+
+# Settings are read on first import of app.core.config: a fresh SQLite database
+# unless DATABASE_URL points the tests at a real one
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///" + os.path.join(tempfile.mkdtemp(), "tests.db"))
+os.environ.setdefault("SECRET_KEY", "test-secret")
@@ -0,0 +1,60 @@
+import asyncio
+import uuid
+
+from sqlalchemy import func
+from sqlalchemy.future import select
+
+from app.crud.user import crud_user
+from app.crud.user_session import crud_session
+from app.db.base import Base
+from app.db.session import AsyncSessionLocal, engine
+from app.models.email_verification_token import EmailVerificationToken
+from app.models.mfa import MFA
+from app.models.password_reset_token import PasswordResetToken
+from app.models.user_session import UserSession
+from app.schemas.user import UserCreate
+from app.schemas.user_session import SessionCreate
+
+CHILDREN = (UserSession, PasswordResetToken, EmailVerificationToken, MFA)
+# Per user: two logins, a reset request, the verification token from registration and an MFA row
+EXPECTED = {"user_sessions": 2, "password_reset_tokens": 1, "email_verification_tokens": 1, "mfa": 1}
+
+
+async def count_children(db, user_id):
+    counts = {}
+    for model in CHILDREN:
+        stmt = select(func.count()).select_from(model).where(model.user_id == user_id)
+        counts[model.__tablename__] = (await db.execute(stmt)).scalar()
+    return counts
+
+
+def test_delete_user_cascades_to_sessions_and_tokens():
+    async def run():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with AsyncSessionLocal() as db:
+            doomed = await crud_user.create_user(
+                db, UserCreate(username="doomed", email="doomed@example.com", password="Passw0rd!")
+            )
+            kept = await crud_user.create_user(
+                db, UserCreate(username="survivor", email="survivor@example.com", password="Passw0rd!")
+            )
+            for user in (doomed, kept):
+                for _ in range(2):
+                    session = SessionCreate(
+                        user_id=user.id, refresh_token=str(uuid.uuid4()), ip_address="127.0.0.1", user_agent="tests"
+                    )
+                    await crud_session.create_session(db, session)
+                await crud_user.create_password_reset_token(db, user.id)
+                db.add(MFA(user_id=user.id, mfa_type="totp"))
+            await db.commit()
+            assert await count_children(db, doomed.id) == EXPECTED
+
+            assert await crud_user.delete_user(db, doomed.id)
+            assert await crud_user.get_user(db, doomed.id) is None
+            assert set((await count_children(db, doomed.id)).values()) == {0}
+            assert await count_children(db, kept.id) == EXPECTED
+            # Already gone
+            assert not await crud_user.delete_user(db, doomed.id)
+
+    asyncio.run(run())
@@ -0,0 +1,121 @@
+import asyncio
+import time
+
+import fakeredis
+import pytest
+
+from app.core.denylist_backend import DenylistBackend, MemoryDenylistBackend, RedisDenylistBackend
+
+
+def redis_backends(**kwargs):
+    """Two workers sharing one fake Redis server."""
+    server = fakeredis.FakeServer()
+    return [
+        RedisDenylistBackend(client=fakeredis.FakeAsyncRedis(server=server), negative_cache_seconds=0, **kwargs)
+        for _ in range(2)
+    ]
+
+
+def test_incomplete_backend_fails_on_creation():
+    class Incomplete(DenylistBackend):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_memory_revoke_then_check():
+    async def run():
+        backend = MemoryDenylistBackend()
+        await backend.revoke("jti-1", int(time.time()) + 60)
+        assert await backend.is_revoked("jti-1")
+        assert not await backend.is_revoked("jti-2")
+
+    asyncio.run(run())
+
+
+def test_memory_expired_revocation_is_purged():
+    async def run():
+        backend = MemoryDenylistBackend()
+        await backend.revoke("jti-1", int(time.time()) - 1)
+        assert not await backend.is_revoked("jti-1")
+        await backend.purge_expired()
+        assert len(backend._local) == 0
+
+    asyncio.run(run())
+
+
+def test_memory_subject_watermark():
+    async def run():
+        now = int(time.time())
+        backend = MemoryDenylistBackend(subject_ttl_seconds=60)
+        await backend.revoke_subject("alice", now)
+        assert await backend.is_subject_revoked("alice", now - 5)
+        # Issued in or after the watermark second
+        assert not await backend.is_subject_revoked("alice", now)
+        assert not await backend.is_subject_revoked("alice", now + 5)
+        assert not await backend.is_subject_revoked("bob", now - 5)
+
+    asyncio.run(run())
+
+
+def test_memory_subject_watermark_expires():
+    async def run():
+        now = int(time.time())
+        backend = MemoryDenylistBackend(subject_ttl_seconds=10)
+        await backend.revoke_subject("alice", now - 60)
+        assert not await backend.is_subject_revoked("alice", now - 100)
+        await backend.purge_expired()
+        assert backend._subjects == {}
+
+    asyncio.run(run())
+
+
+def test_redis_revoke_is_seen_by_other_workers_after_flush():
+    async def run():
+        writer, reader = redis_backends(batch_size=10)
+        await writer.revoke("jti-1", int(time.time()) + 60)
+        assert await writer.is_revoked("jti-1")
+        assert not await reader.is_revoked("jti-1")
+        await writer.flush()
+        assert await reader.is_revoked("jti-1")
+
+    asyncio.run(run())
+
+
+def test_redis_full_batch_is_flushed_on_revoke():
+    async def run():
+        writer, reader = redis_backends(batch_size=2)
+        exp = int(time.time()) + 60
+        await writer.revoke("jti-1", exp)
+        await writer.revoke("jti-2", exp)
+        assert await reader.is_revoked("jti-1") and await reader.is_revoked("jti-2")
+
+    asyncio.run(run())
+
+
+def test_redis_keys_expire_with_the_token():
+    async def run():
+        writer, reader = redis_backends(batch_size=10)
+        now = int(time.time())
+        await writer.revoke("live", now + 60)
+        await writer.revoke("expired", now - 1)
+        await writer.flush()
+        assert 0 < await writer._client.ttl("denylist:live") <= 60
+        assert not await writer._client.exists("denylist:expired")
+        assert not await reader.is_revoked("expired")
+
+    asyncio.run(run())
+
+
+def test_redis_subject_watermark():
+    async def run():
+        now = int(time.time())
+        writer, reader = redis_backends(subject_ttl_seconds=60)
+        await writer.revoke_subject("alice", now)
+        assert await reader.is_subject_revoked("alice", now - 5)
+        assert not await reader.is_subject_revoked("alice", now)
+        assert not await reader.is_subject_revoked("alice", now + 5)
+        assert 0 < await writer._client.ttl("denylist:sub:alice") <= 60
+
+    asyncio.run(run())
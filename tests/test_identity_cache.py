@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+from sqlalchemy import update
+
+from app.core.identity_cache import InvalidationBus
+from app.crud.user import crud_user
+from app.db.base import Base
+from app.db.session import AsyncSessionLocal, engine
+from app.models.user import User
+from app.schemas.user import UserCreate
+
+
+def test_incomplete_bus_fails_on_creation():
+    class Incomplete(InvalidationBus):
+        async def publish(self, message: str):
+            pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_stale_identity_cannot_change_the_password():
+    async def run():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with AsyncSessionLocal() as db:
+            user = await crud_user.create_user(
+                db, UserCreate(username="stalecache", email="stale@example.com", password="Passw0rd!")
+            )
+            identity = await crud_user.get_identity_by_username(db, "stalecache")
+            assert crud_user.identities.get_by_username("stalecache") == identity
+            assert await crud_user.get_password_hash(db, identity) == user.hashed_password
+
+            # Changed by another worker whose invalidation never arrived here
+            await db.execute(
+                update(User).where(User.id == user.id).values(password_version=User.password_version + 1)
+            )
+            await db.commit()
+            assert crud_user.identities.get_by_username("stalecache") == identity
+            assert await crud_user.get_password_hash(db, identity) is None
+            assert crud_user.identities.get_by_username("stalecache") is None
+            assert await crud_user.update_password(db, user.id, "N3wPassw0rd!", identity.password_version) is None
+
+            fresh = await crud_user.get_identity_by_username(db, "stalecache")
+            assert fresh.password_version == identity.password_version + 1
+            updated = await crud_user.update_password(db, user.id, "N3wPassw0rd!", fresh.password_version)
+            assert updated.password_version == fresh.password_version + 1
+
+    asyncio.run(run())
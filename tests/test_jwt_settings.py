@@ -0,0 +1,23 @@
+from datetime import timedelta
+
+import jwt
+from fastapi_jwt_auth import AuthJWT
+
+from app.core.config import settings
+from app.core import token_handler  # noqa: F401  loads JWTSettings into AuthJWT
+
+
+def lifetime(token: str) -> timedelta:
+    claims = jwt.decode(token, options={"verify_signature": False})
+    return timedelta(seconds=claims["exp"] - claims["iat"])
+
+
+def test_tokens_expire_after_the_configured_lifetimes():
+    # The session sweep deletes rows once the refresh token's lifetime has passed
+    Authorize = AuthJWT()
+    assert lifetime(Authorize.create_access_token(subject="alice")) == timedelta(
+        minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
+    )
+    assert lifetime(Authorize.create_refresh_token(subject="alice")) == timedelta(
+        days=settings.REFRESH_TOKEN_EXPIRE_DAYS
+    )
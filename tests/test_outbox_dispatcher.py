@@ -0,0 +1,163 @@
+import asyncio
+import os
+import socket
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from aiosmtpd.controller import Controller
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.future import select
+
+from app.core.mailer import SMTPConnectionPool
+from app.core.notifications import OutboxDispatcher
+from app.crud.outbox import crud_outbox
+from app.models.outbox_message import OutboxMessage
+
+RETRY_BASE_SECONDS = 10.0
+
+
+class RecordingHandler:
+    """Accepts mail once ``failures`` deliveries have been refused, optionally holding each one until released."""
+
+    def __init__(self, failures: int = 0, hold: bool = False):
+        self.failures = failures
+        self.delivered = []
+        self.receiving = threading.Event()
+        self.release = threading.Event()
+        if not hold:
+            self.release.set()
+
+    async def handle_DATA(self, server, session, envelope):
+        self.receiving.set()
+        while not self.release.is_set():
+            await asyncio.sleep(0.01)
+        if self.failures:
+            self.failures -= 1
+            return "451 Try again later"
+        self.delivered.append(envelope)
+        return "250 OK"
+
+
+@contextmanager
+def smtp_server(handler: RecordingHandler):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    try:
+        yield SMTPConnectionPool(host="127.0.0.1", port=port, size=2, timeout=5)
+    finally:
+        controller.stop()
+
+
+async def outbox_sessions():
+    engine = create_async_engine("sqlite+aiosqlite:///" + os.path.join(tempfile.mkdtemp(), "outbox.db"))
+    async with engine.begin() as conn:
+        await conn.run_sync(OutboxMessage.metadata.create_all, tables=[OutboxMessage.__table__])
+    return engine, async_sessionmaker(engine, expire_on_commit=False)
+
+
+async def queue(sessions, *recipients):
+    async with sessions() as db:
+        for recipient in recipients:
+            crud_outbox.add(db, "test", recipient, "Hello", "Hello there\n")
+        await db.commit()
+
+
+async def outbox(sessions):
+    async with sessions() as db:
+        return (await db.execute(select(OutboxMessage).order_by(OutboxMessage.id))).scalars().all()
+
+
+def dispatcher(mailer, sessions, **kwargs):
+    return OutboxDispatcher(
+        mailer=mailer,
+        session_factory=sessions,
+        sender="noreply@example.com",
+        retry_base_seconds=RETRY_BASE_SECONDS,
+        **kwargs,
+    )
+
+
+def test_dispatcher_delivers_queued_messages():
+    handler = RecordingHandler()
+
+    async def run(mailer):
+        engine, sessions = await outbox_sessions()
+        await queue(sessions, "alice@example.com", "bob@example.com")
+        assert await dispatcher(mailer, sessions).dispatch_once() == 2
+        assert [m.status for m in await outbox(sessions)] == ["sent", "sent"]
+        # Nothing left to claim
+        assert await dispatcher(mailer, sessions).dispatch_once() == 0
+        await mailer.close()
+        await engine.dispose()
+
+    with smtp_server(handler) as mailer:
+        asyncio.run(run(mailer))
+    assert sorted(envelope.rcpt_tos[0] for envelope in handler.delivered) == [
+        "alice@example.com",
+        "bob@example.com",
+    ]
+
+
+def test_dispatcher_retries_with_backoff_after_smtp_failure():
+    handler = RecordingHandler(failures=2)
+
+    async def run(mailer):
+        engine, sessions = await outbox_sessions()
+        await queue(sessions, "alice@example.com")
+        outbox_dispatcher = dispatcher(mailer, sessions)
+
+        for attempts in (1, 2):
+            before = time.time()
+            assert await outbox_dispatcher.dispatch_once() == 1
+            [message] = await outbox(sessions)
+            assert (message.status, message.attempts) == ("pending", attempts)
+            assert "451" in message.last_error
+            # Jittered between half and all of base * 2^(attempts - 1)
+            delay = RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+            assert int(before + delay * 0.5) <= message.next_attempt_at <= int(time.time() + delay)
+
+            # Not due yet
+            assert await outbox_dispatcher.dispatch_once() == 0
+            async with sessions() as db:
+                await db.merge(OutboxMessage(id=message.id, next_attempt_at=0))
+                await db.commit()
+
+        assert await outbox_dispatcher.dispatch_once() == 1
+        [message] = await outbox(sessions)
+        assert (message.status, message.attempts, message.last_error) == (
+            "sent",
+            2,
+            None,
+        )
+        await mailer.close()
+        await engine.dispose()
+
+    with smtp_server(handler) as mailer:
+        asyncio.run(run(mailer))
+    assert len(handler.delivered) == 1
+
+
+def test_claimed_message_is_not_sent_twice():
+    handler = RecordingHandler(hold=True)
+
+    async def run(mailer):
+        engine, sessions = await outbox_sessions()
+        await queue(sessions, "alice@example.com")
+        first = asyncio.create_task(dispatcher(mailer, sessions).dispatch_once())
+        # The first dispatcher has claimed the message and is mid-send
+        await asyncio.to_thread(handler.receiving.wait, 5)
+        assert await dispatcher(mailer, sessions).dispatch_once() == 0
+        handler.release.set()
+        assert await first == 1
+        assert [m.status for m in await outbox(sessions)] == ["sent"]
+        await mailer.close()
+        await engine.dispose()
+
+    with smtp_server(handler) as mailer:
+        asyncio.run(run(mailer))
+    assert len(handler.delivered) == 1
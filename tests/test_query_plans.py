@@ -0,0 +1,7 @@
+import asyncio
+
+from benchmarks import query_plans
+
+
+def test_crud_statements_use_indexes():
+    assert asyncio.run(query_plans.check()) == []
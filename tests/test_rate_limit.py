@@ -0,0 +1,82 @@
+import asyncio
+import math
+
+import httpx
+import pytest
+
+from app.core.rate_limit import MemoryRateLimitBackend, RateLimitBackend, SlidingWindowSketch, rate_limiter
+from app.crud.user import crud_user
+from app.db.base import Base
+from app.db.session import AsyncSessionLocal, engine
+from app.main import app
+from app.schemas.user import UserCreate
+
+
+def hits(sketch: SlidingWindowSketch, key: str, count: int, now: float) -> float:
+    for _ in range(count):
+        estimate, _ = sketch.hit(key, now)
+    return estimate
+
+
+def test_incomplete_backend_fails_on_creation():
+    class Incomplete(RateLimitBackend):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_sketch_counts_within_a_window():
+    sketch = SlidingWindowSketch(window_seconds=60, width=1024, depth=4)
+    assert hits(sketch, "alice", 5, 600) == 5
+    assert hits(sketch, "alice", 1, 659) == 6
+    assert hits(sketch, "bob", 1, 659) == 1
+
+
+def test_sketch_weights_the_previous_window_by_its_overlap():
+    sketch = SlidingWindowSketch(window_seconds=60, width=1024, depth=4)
+    hits(sketch, "alice", 10, 600)
+    # A quarter into the next window, three quarters of the previous one still count
+    assert hits(sketch, "alice", 1, 675) == pytest.approx(10 * 0.75 + 1)
+    assert hits(sketch, "alice", 1, 714) == pytest.approx(10 * 0.1 + 2)
+
+
+def test_sketch_forgets_windows_older_than_the_previous_one():
+    sketch = SlidingWindowSketch(window_seconds=60, width=1024, depth=4)
+    hits(sketch, "alice", 10, 600)
+    assert hits(sketch, "alice", 1, 720) == 1
+
+
+def test_sketch_overestimates_by_a_bounded_amount():
+    width, keys = 256, 5000
+    sketch = SlidingWindowSketch(window_seconds=60, width=width, depth=4)
+    for i in range(keys):
+        sketch.hit(f"user-{i}", 600)
+    # Collisions only ever add, and count-min keeps the excess under e * hits / width for all but a few keys
+    bound = math.e * (keys + 1) / width
+    for i in range(200):
+        estimate = hits(sketch, f"target-{i}", 1, 600)
+        assert 1 <= estimate <= 1 + bound
+
+
+def test_login_attempts_share_a_bucket_across_username_and_email(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "backend", MemoryRateLimitBackend())
+    limit, _ = rate_limiter.rules["login:username"]
+
+    async def run():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with AsyncSessionLocal() as db:
+            await crud_user.create_user(
+                db, UserCreate(username="ratelimited", email="rl@example.com", password="Passw0rd!")
+            )
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            statuses = []
+            for attempt in range(limit + 1):
+                login = ["ratelimited", "rl@example.com"][attempt % 2]
+                response = await client.post("/api/v1/auth/login", params={"username": login, "password": "wrong"})
+                statuses.append(response.status_code)
+        assert statuses == [401] * limit + [429]
+
+    asyncio.run(run())